@@ -1,29 +1,19 @@
 """CLI entry point for the personal RAG system."""
 
 import argparse
+import logging
 import sys
 import time
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
+from typing import Iterator
 
-from src.chunker import chunk_emails, chunk_imessages
-from src.embed import get_embedding
+from src.chunker import Chunk, chunk_emails, chunk_imessages
 from src.ingest.email import extract_emails
 from src.ingest.imessage import extract_messages
+from src.pipeline import ingest_chunks
 from src.query import generate_answer, retrieve
-from src.vectordb import get_stats, insert_chunk
-
-
-def parse_since(value: str) -> datetime:
-    """Parse a relative time like '30d', '7d', '24h' into a UTC datetime."""
-    unit = value[-1].lower()
-    amount = int(value[:-1])
-    now = datetime.now(tz=timezone.utc)
-    if unit == "d":
-        return now - timedelta(days=amount)
-    elif unit == "h":
-        return now - timedelta(hours=amount)
-    else:
-        raise ValueError(f"Unknown time unit '{unit}'. Use 'd' (days) or 'h' (hours).")
+from src.timeutils import parse_since
+from src.vectordb import get_stats
 
 
 def cmd_ingest(args: argparse.Namespace) -> None:
@@ -49,28 +39,24 @@ def _ingest_imessage(since: datetime | None) -> None:
     total_messages = 0
     start = time.time()
 
-    for chunk in chunks:
-        total_chunks += 1
-        total_messages += chunk.message_count
-
-        # Progress update every 10 chunks
-        if total_chunks % 10 == 0:
-            elapsed = time.time() - start
-            rate = total_chunks / elapsed if elapsed > 0 else 0
-            print(
-                f"  Chunked: {total_chunks} chunks ({total_messages} messages) "
-                f"[{rate:.1f} chunks/s]",
-                end="\r",
-            )
-
-        try:
-            embedding = get_embedding(chunk.text)
-        except Exception as e:
-            print(f"\n  Warning: embedding failed for chunk ({chunk.contact}, "
-                  f"{chunk.start_time.strftime('%Y-%m-%d %H:%M')}): {e}")
-            continue
-
-        insert_chunk(chunk, embedding)
+    def counted() -> Iterator[Chunk]:
+        nonlocal total_chunks, total_messages
+        for chunk in chunks:
+            total_chunks += 1
+            total_messages += chunk.message_count
+
+            # Progress update every 10 chunks
+            if total_chunks % 10 == 0:
+                elapsed = time.time() - start
+                rate = total_chunks / elapsed if elapsed > 0 else 0
+                print(
+                    f"  Chunked: {total_chunks} chunks ({total_messages} messages) "
+                    f"[{rate:.1f} chunks/s]",
+                    end="\r",
+                )
+            yield chunk
+
+    ingest_chunks(counted(), "chunk")
 
     elapsed = time.time() - start
     print(f"\nDone. {total_chunks} chunks from {total_messages} messages "
@@ -87,25 +73,21 @@ def _ingest_email(since: datetime | None) -> None:
     total_chunks = 0
     start = time.time()
 
-    for chunk in chunks:
-        total_chunks += 1
-
-        if total_chunks % 10 == 0:
-            elapsed = time.time() - start
-            rate = total_chunks / elapsed if elapsed > 0 else 0
-            print(
-                f"  Processed: {total_chunks} emails [{rate:.1f} chunks/s]",
-                end="\r",
-            )
+    def counted() -> Iterator[Chunk]:
+        nonlocal total_chunks
+        for chunk in chunks:
+            total_chunks += 1
 
-        try:
-            embedding = get_embedding(chunk.text)
-        except Exception as e:
-            print(f"\n  Warning: embedding failed for email "
-                  f"({chunk.contact}, {chunk.start_time.strftime('%Y-%m-%d %H:%M')}): {e}")
-            continue
+            if total_chunks % 10 == 0:
+                elapsed = time.time() - start
+                rate = total_chunks / elapsed if elapsed > 0 else 0
+                print(
+                    f"  Processed: {total_chunks} emails [{rate:.1f} chunks/s]",
+                    end="\r",
+                )
+            yield chunk
 
-        insert_chunk(chunk, embedding)
+    ingest_chunks(counted(), "email")
 
     elapsed = time.time() - start
     print(f"\nDone. {total_chunks} email chunks in {elapsed:.1f}s")
@@ -200,6 +182,10 @@ def main() -> None:
 
     args = parser.parse_args()
 
+    # Library modules log skipped chunks/files as warnings; the leading newline
+    # keeps them off the \r-rewritten progress line
+    logging.basicConfig(level=logging.WARNING, format="\n  %(levelname)s: %(message)s")
+
     if args.command == "ingest":
         cmd_ingest(args)
     elif args.command == "query":
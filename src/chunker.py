@@ -1,12 +1,17 @@
 """Group raw messages into conversation chunks for embedding."""
 
+import time
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
+from itertools import groupby
+from operator import attrgetter
 from typing import Generator, Iterable
 
-from src.config import CHUNK_WINDOW_HOURS
+from src.config import APPLE_EPOCH_OFFSET, CHUNK_WINDOW_HOURS
 from src.ingest.email import RawEmail
-from src.ingest.imessage import RawMessage
+from src.ingest.imessage import RawMessage, apple_ts_to_datetime
+
+_NS_PER_HOUR = 3600 * 1_000_000_000
 
 
 @dataclass
@@ -23,16 +28,23 @@ class Chunk:
 def _format_imessage_chunk(messages: list[RawMessage], contact: str) -> Chunk:
     """Format a list of messages from one conversation window into a Chunk."""
     lines = []
+    last_minute = None
+    ts = ""
     for msg in messages:
         sender = "Me" if msg.is_from_me else contact
-        ts = msg.date.strftime("%Y-%m-%d %H:%M")
+        # Bursts of messages share a minute; only re-format when it changes
+        unix_ts = msg.date_ns // 1_000_000_000 + APPLE_EPOCH_OFFSET
+        minute = unix_ts // 60
+        if minute != last_minute:
+            ts = time.strftime("%Y-%m-%d %H:%M", time.gmtime(unix_ts))
+            last_minute = minute
         lines.append(f"[{ts}] {sender}: {msg.text}")
 
     return Chunk(
         source="imessage",
         contact=contact,
-        start_time=messages[0].date,
-        end_time=messages[-1].date,
+        start_time=apple_ts_to_datetime(messages[0].date_ns),
+        end_time=apple_ts_to_datetime(messages[-1].date_ns),
         text="\n".join(lines),
         message_count=len(messages),
     )
@@ -48,27 +60,19 @@ def chunk_imessages(
     A gap of more than `window_hours` between consecutive messages from the same
     contact starts a new chunk.
     """
-    window = timedelta(hours=window_hours)
-    current_contact: str | None = None
-    buffer: list[RawMessage] = []
-
-    for msg in messages:
-        if msg.contact != current_contact:
-            # New contact — flush buffer
-            if buffer:
-                yield _format_imessage_chunk(buffer, current_contact)
-            buffer = [msg]
-            current_contact = msg.contact
-        elif buffer and (msg.date - buffer[-1].date) > window:
-            # Same contact but gap exceeds window — flush and start new chunk
-            yield _format_imessage_chunk(buffer, current_contact)
-            buffer = [msg]
-        else:
-            buffer.append(msg)
+    # Compare raw Apple nanosecond timestamps; no datetime math per message
+    window_ns = window_hours * _NS_PER_HOUR
 
-    # Flush remaining
-    if buffer:
-        yield _format_imessage_chunk(buffer, current_contact)
+    for contact, run in groupby(messages, key=attrgetter("contact")):
+        buffer = [next(run)]
+        for msg in run:
+            if msg.date_ns - buffer[-1].date_ns > window_ns:
+                # Gap exceeds window — flush and start new chunk
+                yield _format_imessage_chunk(buffer, contact)
+                buffer = [msg]
+            else:
+                buffer.append(msg)
+        yield _format_imessage_chunk(buffer, contact)
 
 
 def chunk_emails(
@@ -61,10 +61,30 @@ GENERATION_API_KEY = os.getenv("GENERATION_API_KEY", "")
 
 # Vector DB
 VECTOR_DB = _expand(os.getenv("VECTOR_DB", "~/.personal-rag/vectors.db"))
+# On-disk embedding precision. float16 halves DB size and scan bandwidth at a
+# cosine-similarity cost around 1e-4; set to float32 for exact storage.
+EMBED_STORAGE_DTYPE = os.getenv("EMBED_STORAGE_DTYPE", "float16").lower()
+if EMBED_STORAGE_DTYPE not in ("float16", "float32"):
+    raise ValueError(
+        f"EMBED_STORAGE_DTYPE must be 'float16' or 'float32', got '{EMBED_STORAGE_DTYPE}'"
+    )
+# Where exact search ranks chunks: "memory" keeps a cached float32 matrix of all
+# embeddings (fast); "sql" scores rows inside SQLite per query (low memory)
+VECTOR_SEARCH = os.getenv("VECTOR_SEARCH", "memory").lower()
+if VECTOR_SEARCH not in ("memory", "sql"):
+    raise ValueError(f"VECTOR_SEARCH must be 'memory' or 'sql', got '{VECTOR_SEARCH}'")
+# Corpus size at which unfiltered searches switch from an exact scan to an
+# HNSW index (requires the optional hnswlib dependency)
+ANN_MIN_CHUNKS = int(os.getenv("ANN_MIN_CHUNKS", "20000"))
 
 # Chunking
 CHUNK_WINDOW_HOURS = int(os.getenv("CHUNK_WINDOW_HOURS", "4"))
 EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "10"))
+# Embedding batches kept in flight during ingest; match Ollama's OLLAMA_NUM_PARALLEL
+EMBED_CONCURRENCY = max(1, int(os.getenv("EMBED_CONCURRENCY", "4")))
+
+# Web dashboard: seconds between background Ollama/backend health probes
+HEALTH_CHECK_INTERVAL = max(1.0, float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "15")))
 
 # Auth
 AUTH_TOKEN_PATH = _expand("~/.personal-rag/auth_token")
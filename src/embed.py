@@ -1,43 +1,99 @@
 """Generate embeddings via Ollama's local API."""
 
-import re
 import time
+from pathlib import Path
 
 import requests
+from blake3 import blake3
+from requests.adapters import HTTPAdapter
 
-from src.config import EMBED_MODEL, OLLAMA_URL
+from src.config import EMBED_CONCURRENCY, EMBED_MODEL, OLLAMA_URL, VECTOR_DB
+from src.vectordb import cache_embeddings, get_cached_embeddings
+
+# One keep-alive connection pool for every Ollama call instead of a fresh
+# TCP handshake per embedding; sized so every ingest worker keeps its socket
+_SESSION = requests.Session()
+_SESSION.mount(
+    "http://", HTTPAdapter(pool_connections=1, pool_maxsize=max(8, EMBED_CONCURRENCY))
+)
 
 # nomic-embed-text has an 8192 token context window; ~4 chars/token is a safe estimate
 _MAX_CHARS = 30_000
 
-# Unicode object replacement char that iMessage inserts for attachments
-_ATTACHMENT_PLACEHOLDER = re.compile(r"\ufffc")
+# Deletes the Unicode object replacement char that iMessage inserts for attachments
+_ATTACHMENT_TABLE = str.maketrans("", "", "\ufffc")
 
 
 def _clean(text: str) -> str:
     """Strip characters that cause Ollama to choke."""
-    text = _ATTACHMENT_PLACEHOLDER.sub("", text)
+    text = text.translate(_ATTACHMENT_TABLE)
     if len(text) > _MAX_CHARS:
         text = text[:_MAX_CHARS]
     return text
 
 
-def get_embedding(text: str, retries: int = 2) -> list[float]:
+def _cache_key(text: str) -> bytes:
+    """Content hash of already-cleaned text, used as the embedding cache key.
+
+    blake3's SIMD path keeps hashing cheap even for 30KB emails.
+    """
+    return blake3(text.encode()).digest()
+
+
+def get_embedding(
+    text: str, retries: int = 2, db_path: Path | None = VECTOR_DB
+) -> list[float]:
     """Get embedding vector for a single text string.
 
-    Retries on transient 500s with a short back-off.
+    A one-element get_embeddings_batch(), so single texts share the batched
+    /api/embed endpoint and the on-disk embedding cache in `db_path`
+    (pass None to bypass it). Retries on transient 500s with a short back-off.
     """
-    text = _clean(text)
+    return get_embeddings_batch([text], retries=retries, db_path=db_path)[0]
+
 
+def _request_embeddings(texts: list[str], retries: int) -> list[list[float]]:
+    """POST already-cleaned texts to Ollama's batched /api/embed endpoint."""
     for attempt in range(1 + retries):
-        resp = requests.post(
-            f"{OLLAMA_URL}/api/embeddings",
-            json={"model": EMBED_MODEL, "prompt": text},
+        resp = _SESSION.post(
+            f"{OLLAMA_URL}/api/embed",
+            json={"model": EMBED_MODEL, "input": texts},
             timeout=120,
         )
         if resp.status_code == 200:
-            return resp.json()["embedding"]
+            return resp.json()["embeddings"]
         if resp.status_code >= 500 and attempt < retries:
             time.sleep(1 * (attempt + 1))
             continue
         resp.raise_for_status()
+
+
+def get_embeddings_batch(
+    texts: list[str], retries: int = 2, db_path: Path | None = VECTOR_DB
+) -> list[list[float]]:
+    """Get embedding vectors for several texts in one request.
+
+    Texts already in the embedding cache are served from `db_path`; the rest
+    are deduplicated and sent to Ollama's batched /api/embed endpoint in a
+    single HTTP round-trip. Returns vectors in the same order as `texts`.
+    """
+    if not texts:
+        return []
+    cleaned = [_clean(t) for t in texts]
+    keys = [_cache_key(t) for t in cleaned]
+
+    found = get_cached_embeddings(keys, EMBED_MODEL, db_path) if db_path is not None else {}
+
+    # Send each distinct missing text once; duplicates fan back out via `keys`
+    unique: dict[bytes, str] = {}
+    for key, text in zip(keys, cleaned):
+        if key not in found and key not in unique:
+            unique[key] = text
+    if unique:
+        fetched = _request_embeddings(list(unique.values()), retries)
+        new = dict(zip(unique, fetched))
+        if db_path is not None:
+            cache_embeddings(new, EMBED_MODEL, db_path)
+        found.update(new)
+
+    return [found[k] for k in keys]
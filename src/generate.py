@@ -1,14 +1,81 @@
 """Generation abstraction — route to Ollama or OpenAI-compatible backends."""
 
-import json
-from typing import Generator
+import socket
+from typing import AsyncGenerator, Generator
 
+import httpx
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
 
 from src import settings
 from src.config import OLLAMA_URL
 
 
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose sockets also enable TCP keep-alive probes.
+
+    urllib3 already sets TCP_NODELAY, so streamed tokens aren't held back by
+    Nagle; SO_KEEPALIVE lets a long-lived pooled connection notice a
+    restarted backend instead of failing on first reuse.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+# Shared keep-alive pool so each chat/generate call (answers, streaming and
+# query reformulation in src/query.py) reuses a connection
+_SESSION = requests.Session()
+_adapter = _KeepAliveAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)
+_SESSION.mount("http://", _adapter)
+_SESSION.mount("https://", _adapter)
+
+# Async counterpart for the web server's SSE endpoints, so a streamed answer
+# awaits Ollama on the event loop instead of pinning a threadpool worker.
+# Opened lazily on first use and closed by the app's lifespan.
+_ASYNC_CLIENT: httpx.AsyncClient | None = None
+
+
+def _async_client() -> httpx.AsyncClient:
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is None or _ASYNC_CLIENT.is_closed:
+        _ASYNC_CLIENT = httpx.AsyncClient(
+            timeout=300, limits=httpx.Limits(max_keepalive_connections=8)
+        )
+    return _ASYNC_CLIENT
+
+
+async def aclose_async_client() -> None:
+    """Close the shared async client, if one was opened."""
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is not None:
+        await _ASYNC_CLIENT.aclose()
+        _ASYNC_CLIENT = None
+
+
+def _iter_lines(resp: requests.Response, chunk_size: int = 4096) -> Generator[bytes, None, None]:
+    """Yield complete newline-terminated lines from a streamed response.
+
+    A lighter iter_lines(): raw chunks go into one bytearray and are split on
+    b"\n" only, with no per-chunk splitlines() over the pending data.
+    """
+    buf = bytearray()
+    for chunk in resp.iter_content(chunk_size=chunk_size):
+        buf.extend(chunk)
+        start = 0
+        while (nl := buf.find(b"\n", start)) != -1:
+            yield bytes(buf[start:nl]).rstrip(b"\r")
+            start = nl + 1
+        del buf[:start]
+    if buf:
+        yield bytes(buf).rstrip(b"\r")
+
+
 def _openai_headers(api_key: str) -> dict:
     headers = {"Content-Type": "application/json"}
     if api_key:
@@ -33,82 +100,152 @@ def stream_chat(messages: list[dict], model: str | None = None) -> Generator[str
 
 
 def _stream_chat_ollama(messages: list[dict], model: str) -> Generator[str, None, None]:
-    resp = requests.post(
+    # Closing the response hands the connection back to the pool
+    with _SESSION.post(
         f"{OLLAMA_URL}/api/chat",
         json={"model": model, "messages": messages, "stream": True},
         stream=True,
         timeout=300,
-    )
-    resp.raise_for_status()
+    ) as resp:
+        resp.raise_for_status()
+
+        for line in _iter_lines(resp):
+            if not line:
+                continue
+            data = orjson.loads(line)
+            token = data.get("message", {}).get("content", "")
+            if token:
+                yield token
+            if data.get("done"):
+                break
+
+
+def _stream_chat_openai(
+    messages: list[dict], model: str, timeout: float = 300
+) -> Generator[str, None, None]:
+    api_url = settings.get_generation_api_url()
+    api_key = settings.get_generation_api_key()
+
+    with _SESSION.post(
+        f"{api_url}/chat/completions",
+        headers=_openai_headers(api_key),
+        json={"model": model, "messages": messages, "stream": True},
+        stream=True,
+        timeout=timeout,
+    ) as resp:
+        resp.raise_for_status()
+
+        for line in _iter_lines(resp):
+            if not line:
+                continue
+            # iter_lines yields raw bytes; orjson parses them without a decode
+            if not line.startswith(b"data: "):
+                continue
+            payload = line[len(b"data: "):]
+            if payload.strip() == b"[DONE]":
+                break
+            data = orjson.loads(payload)
+            choices = data.get("choices", [])
+            if not choices:
+                continue
+            token = choices[0].get("delta", {}).get("content", "")
+            if token:
+                yield token
+
+
+async def astream_chat(
+    messages: list[dict], model: str | None = None
+) -> AsyncGenerator[str, None]:
+    """Async version of stream_chat() for the web server. Yields token strings."""
+    model = model or settings.get_generation_model()
+    backend = settings.get_generation_backend()
 
-    for line in resp.iter_lines():
-        if not line:
-            continue
-        data = json.loads(line)
-        token = data.get("message", {}).get("content", "")
-        if token:
-            yield token
-        if data.get("done"):
-            break
+    if backend == "openai":
+        stream = _astream_chat_openai(messages, model)
+    else:
+        stream = _astream_chat_ollama(messages, model)
+    async for token in stream:
+        yield token
 
 
-def _stream_chat_openai(messages: list[dict], model: str) -> Generator[str, None, None]:
+async def _astream_chat_ollama(
+    messages: list[dict], model: str
+) -> AsyncGenerator[str, None]:
+    async with _async_client().stream(
+        "POST",
+        f"{OLLAMA_URL}/api/chat",
+        json={"model": model, "messages": messages, "stream": True},
+    ) as resp:
+        resp.raise_for_status()
+
+        async for line in resp.aiter_lines():
+            if not line:
+                continue
+            data = orjson.loads(line)
+            token = data.get("message", {}).get("content", "")
+            if token:
+                yield token
+            if data.get("done"):
+                break
+
+
+async def _astream_chat_openai(
+    messages: list[dict], model: str
+) -> AsyncGenerator[str, None]:
     api_url = settings.get_generation_api_url()
     api_key = settings.get_generation_api_key()
 
-    resp = requests.post(
+    async with _async_client().stream(
+        "POST",
         f"{api_url}/chat/completions",
         headers=_openai_headers(api_key),
         json={"model": model, "messages": messages, "stream": True},
-        stream=True,
-        timeout=300,
-    )
-    resp.raise_for_status()
-
-    for line in resp.iter_lines():
-        if not line:
-            continue
-        text = line.decode("utf-8") if isinstance(line, bytes) else line
-        if not text.startswith("data: "):
-            continue
-        payload = text[len("data: "):]
-        if payload.strip() == "[DONE]":
-            break
-        data = json.loads(payload)
-        choices = data.get("choices", [])
-        if not choices:
-            continue
-        token = choices[0].get("delta", {}).get("content", "")
-        if token:
-            yield token
-
-
-def generate_once(prompt: str, model: str | None = None) -> str:
+    ) as resp:
+        resp.raise_for_status()
+
+        async for line in resp.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            payload = line[len("data: "):]
+            if payload.strip() == "[DONE]":
+                break
+            data = orjson.loads(payload)
+            choices = data.get("choices", [])
+            if not choices:
+                continue
+            token = choices[0].get("delta", {}).get("content", "")
+            if token:
+                yield token
+
+
+def generate_once(prompt: str, model: str | None = None, timeout: float = 30) -> str:
     """Single non-streaming generation. Returns the full response text.
 
     For the OpenAI backend (which may be streaming-only), we accumulate
-    streamed tokens.
+    streamed tokens. `timeout` is the HTTP read timeout: for Ollama it
+    bounds the whole call, for the streamed OpenAI reply the wait for
+    each chunk.
     """
     model = model or settings.get_generation_model()
     backend = settings.get_generation_backend()
 
     if backend == "openai":
-        return _generate_once_openai(prompt, model)
+        return _generate_once_openai(prompt, model, timeout)
     else:
-        return _generate_once_ollama(prompt, model)
+        return _generate_once_ollama(prompt, model, timeout)
 
 
-def _generate_once_ollama(prompt: str, model: str) -> str:
-    resp = requests.post(
+def _generate_once_ollama(prompt: str, model: str, timeout: float) -> str:
+    resp = _SESSION.post(
         f"{OLLAMA_URL}/api/generate",
         json={"model": model, "prompt": prompt, "stream": False},
-        timeout=30,
+        timeout=timeout,
     )
     resp.raise_for_status()
     return resp.json().get("response", "").strip()
 
 
-def _generate_once_openai(prompt: str, model: str) -> str:
+def _generate_once_openai(prompt: str, model: str, timeout: float) -> str:
     messages = [{"role": "user", "content": prompt}]
-    tokens = list(_stream_chat_openai(messages, model))
+    tokens = list(_stream_chat_openai(messages, model, timeout))
     return "".join(tokens).strip()
@@ -3,13 +3,19 @@
 import email
 import email.message
 import logging
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Generator
+from typing import Generator, Iterator
 
 from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 
 from src.config import MAIL_DIR
 
@@ -20,6 +26,14 @@ _ALLOWED_FOLDERS = {"inbox", "sent", "archive", "all mail"}
 # Folder names to always exclude
 _BLOCKED_FOLDERS = {"spam", "junk", "trash", "drafts", "deleted"}
 
+# Files handed to each worker process per round-trip
+_PARSE_CHUNKSIZE = 64
+# Parse jobs queued per worker; bounds how far parsing runs ahead of the consumer
+_PARSE_AHEAD = 2
+
+# Below this size a plain read() is cheaper than setting up an mmap
+_MMAP_THRESHOLD = 16 * 1024
+
 
 @dataclass
 class RawEmail:
@@ -32,32 +46,43 @@ class RawEmail:
     message_id: str
 
 
-def _parse_emlx(path: Path) -> RawEmail | None:
-    """Parse a single .emlx file into a RawEmail.
-
-    .emlx format: line 1 is a byte count, followed by that many bytes of
-    RFC822 content, then an Apple plist trailer.
-    """
-    try:
-        raw = path.read_bytes()
-    except OSError as e:
-        logger.warning("Cannot read %s: %s", path, e)
-        return None
-
+def _slice_rfc822(buf: bytes | mmap.mmap, path: Path) -> bytes | None:
+    """Return the RFC822 payload of an .emlx buffer, dropping the plist trailer."""
     # First line is the byte count
-    newline_idx = raw.find(b"\n")
+    newline_idx = buf.find(b"\n")
     if newline_idx == -1:
         logger.warning("No newline in %s — not a valid .emlx", path)
         return None
 
     try:
-        byte_count = int(raw[:newline_idx].strip())
+        byte_count = int(buf[:newline_idx].strip())
     except ValueError:
         logger.warning("Invalid byte count in %s", path)
         return None
 
     rfc822_start = newline_idx + 1
-    rfc822_bytes = raw[rfc822_start : rfc822_start + byte_count]
+    return buf[rfc822_start : rfc822_start + byte_count]
+
+
+def _parse_emlx(path: Path) -> RawEmail | None:
+    """Parse a single .emlx file into a RawEmail.
+
+    .emlx format: line 1 is a byte count, followed by that many bytes of
+    RFC822 content, then an Apple plist trailer. Large files are mmapped so
+    only the RFC822 slice is copied into memory.
+    """
+    try:
+        with path.open("rb") as f:
+            if os.fstat(f.fileno()).st_size < _MMAP_THRESHOLD:
+                rfc822_bytes = _slice_rfc822(f.read(), path)
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    rfc822_bytes = _slice_rfc822(mm, path)
+    except OSError as e:
+        logger.warning("Cannot read %s: %s", path, e)
+        return None
+    if rfc822_bytes is None:
+        return None
 
     try:
         msg = email.message_from_bytes(rfc822_bytes)
@@ -99,10 +124,22 @@ def _decode_payload(payload: bytes, charset: str | None) -> str:
         return payload.decode("utf-8", errors="replace")
 
 
+def _html_to_text(html: str) -> str:
+    """Strip HTML tags, keeping block boundaries as newlines.
+
+    Uses selectolax's C-backed lexbor parser; falls back to BeautifulSoup
+    if it chokes on a malformed document.
+    """
+    try:
+        return LexborHTMLParser(html).text(separator="\n")
+    except Exception:
+        return BeautifulSoup(html, "html.parser").get_text(separator="\n")
+
+
 def _extract_body(msg: email.message.Message) -> str | None:
     """Extract plain text from an email message.
 
-    Prefers text/plain parts. Falls back to text/html stripped via BeautifulSoup.
+    Prefers text/plain parts. Falls back to text/html stripped of markup.
     """
     if not msg.is_multipart():
         content_type = msg.get_content_type()
@@ -113,7 +150,7 @@ def _extract_body(msg: email.message.Message) -> str | None:
         if content_type == "text/plain":
             return text
         if content_type == "text/html":
-            return BeautifulSoup(text, "html.parser").get_text(separator="\n")
+            return _html_to_text(text)
         return None
 
     # Multipart: collect text/plain parts first, fall back to text/html
@@ -136,10 +173,7 @@ def _extract_body(msg: email.message.Message) -> str | None:
     if plain_parts:
         return "\n".join(plain_parts)
     if html_parts:
-        return "\n".join(
-            BeautifulSoup(h, "html.parser").get_text(separator="\n")
-            for h in html_parts
-        )
+        return "\n".join(_html_to_text(h) for h in html_parts)
     return None
 
 
@@ -157,13 +191,43 @@ def _allowed_folder(mbox_name: str) -> bool:
     return False
 
 
-def _find_allowed_mboxes(mail_dir: Path) -> list[Path]:
-    """Find all .mbox directories that pass the folder filter."""
-    allowed: list[Path] = []
-    for mbox in mail_dir.rglob("*.mbox"):
-        if mbox.is_dir() and _allowed_folder(mbox.name):
-            allowed.append(mbox)
-    return allowed
+def _walk_emlx(root: str | Path, in_allowed: bool = False) -> Iterator[os.DirEntry]:
+    """Yield .emlx entries whose nearest enclosing .mbox passes the folder filter.
+
+    One os.scandir pass over the tree; the filter runs once per .mbox dir.
+    Blocked mailboxes are still descended into, since Mail nests mailboxes
+    (e.g. "[Gmail].mbox/All Mail.mbox").
+    """
+    try:
+        it = os.scandir(root)
+    except OSError as e:
+        logger.warning("Cannot scan %s: %s", root, e)
+        return
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name.endswith(".mbox"):
+                    yield from _walk_emlx(entry.path, _allowed_folder(entry.name))
+                else:
+                    yield from _walk_emlx(entry.path, in_allowed)
+            elif in_allowed and entry.name.endswith(".emlx"):
+                yield entry
+
+
+def _parse_many(paths: list[Path]) -> list[RawEmail | None]:
+    return [_parse_emlx(p) for p in paths]
+
+
+def _iter_paths(mail_dir: Path, since_ts: float | None) -> Iterator[Path]:
+    for entry in _walk_emlx(mail_dir):
+        # Quick mtime check before expensive parsing
+        if since_ts is not None:
+            try:
+                if entry.stat().st_mtime < since_ts:
+                    continue
+            except OSError:
+                continue
+        yield Path(entry.path)
 
 
 def extract_emails(
@@ -172,33 +236,43 @@ def extract_emails(
 ) -> Generator[RawEmail, None, None]:
     """Stream parsed emails from Apple Mail .emlx files.
 
-    Finds allowed .mbox directories first, then walks only those for .emlx
-    files. Uses file mtime as a cheap pre-filter before full parsing when
-    a `since` cutoff is provided.
+    Walks the Mail directory, keeping .emlx files that live in allowed
+    mailboxes. Uses file mtime as a cheap pre-filter before full parsing when
+    a `since` cutoff is provided. Parsing is fanned out across a process
+    pool while the walk continues; results are yielded in discovery order.
+    Only a few batches are parsed ahead of the consumer, so memory stays
+    flat when embedding is the slower stage.
     """
     if not mail_dir.exists():
         logger.warning("Mail directory does not exist: %s", mail_dir)
         return
 
     since_ts = since.timestamp() if since else None
-    allowed_mboxes = _find_allowed_mboxes(mail_dir)
-    logger.info("Found %d allowed mailboxes", len(allowed_mboxes))
-
-    for mbox_dir in allowed_mboxes:
-        for emlx_path in mbox_dir.rglob("*.emlx"):
-            # Quick mtime check before expensive parsing
-            if since_ts is not None:
-                try:
-                    if emlx_path.stat().st_mtime < since_ts:
-                        continue
-                except OSError:
+    paths = _iter_paths(mail_dir, since_ts)
+    seen = 0
+
+    # Parsing (email + HTML stripping) is CPU-bound and independent per file
+    workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window = workers * _PARSE_AHEAD
+        pending: deque = deque()
+        while True:
+            while len(pending) < window:
+                batch = list(islice(paths, _PARSE_CHUNKSIZE))
+                if not batch:
+                    break
+                seen += len(batch)
+                pending.append(pool.submit(_parse_many, batch))
+            if not pending:
+                break
+
+            for raw_email in pending.popleft().result():
+                if raw_email is None:
                     continue
 
-            raw_email = _parse_emlx(emlx_path)
-            if raw_email is None:
-                continue
+                if since is not None and raw_email.date < since:
+                    continue
 
-            if since is not None and raw_email.date < since:
-                continue
+                yield raw_email
 
-            yield raw_email
+    logger.info("Parsed %d candidate .emlx files", seen)
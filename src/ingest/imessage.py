@@ -17,10 +17,15 @@ _NSSTRING_MARKER = b"NSString"
 class RawMessage:
     rowid: int
     text: str
-    date: datetime
+    date_ns: int  # Apple Core Data nanoseconds since 2001-01-01 UTC
     is_from_me: bool
     contact: str  # phone number or email
 
+    @property
+    def date(self) -> datetime:
+        """UTC datetime, materialized on demand from `date_ns`."""
+        return apple_ts_to_datetime(self.date_ns)
+
 
 def apple_ts_to_datetime(apple_ns: int) -> datetime:
     """Convert Apple Core Data nanosecond timestamp to UTC datetime."""
@@ -47,12 +52,12 @@ def _extract_text_from_attributed_body(blob: bytes) -> str | None:
     if idx == -1:
         return None
 
-    # Advance past the marker and skip type-descriptor bytes until '+'
-    pos = idx + len(_NSSTRING_MARKER)
-    while pos < len(blob) and blob[pos] != 0x2B:
-        pos += 1
+    # Skip type-descriptor bytes after the marker up to the '+' (memchr in C)
+    plus = blob.find(b"\x2B", idx + len(_NSSTRING_MARKER))
+    if plus == -1:
+        return None
 
-    pos += 1  # skip the '+' itself
+    pos = plus + 1  # skip the '+' itself
     if pos >= len(blob):
         return None
 
@@ -86,8 +91,14 @@ def extract_messages(
     then date, suitable for downstream chunking by conversation window.
     """
     conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
-    conn.row_factory = sqlite3.Row
     try:
+        # The ORDER BY below sorts the whole message table: give SQLite room to
+        # do it in memory and read pages via mmap instead of read() syscalls.
+        conn.execute("PRAGMA mmap_size=268435456")  # 256MB
+        conn.execute("PRAGMA cache_size=-200000")  # ~200MB
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+        # Plain tuples (no sqlite3.Row) — columns are unpacked by position below
         query = """
             SELECT
                 m.ROWID   AS rowid,
@@ -111,26 +122,24 @@ def extract_messages(
         query += " ORDER BY contact, m.date"
 
         cursor = conn.execute(query, params)
+        cursor.arraysize = BATCH_SIZE
 
         while True:
-            rows = cursor.fetchmany(BATCH_SIZE)
+            rows = cursor.fetchmany()
             if not rows:
                 break
-            for row in rows:
-                text = row["text"]
-                if not text and row["attributed_body"]:
-                    text = _extract_text_from_attributed_body(
-                        bytes(row["attributed_body"])
-                    )
+            for rowid, text, attributed_body, date, is_from_me, contact in rows:
+                if not text and attributed_body:
+                    text = _extract_text_from_attributed_body(bytes(attributed_body))
                 if not text:
                     continue
 
                 yield RawMessage(
-                    rowid=row["rowid"],
+                    rowid=rowid,
                     text=text,
-                    date=apple_ts_to_datetime(row["date"]),
-                    is_from_me=bool(row["is_from_me"]),
-                    contact=row["contact"],
+                    date_ns=date,
+                    is_from_me=bool(is_from_me),
+                    contact=contact,
                 )
     finally:
         conn.close()
@@ -0,0 +1,150 @@
+"""Threaded ingest pipeline: chunk → embed → insert with the stages overlapped.
+
+Extraction/chunking runs on a producer thread, EMBED_CONCURRENCY workers
+embed batches against Ollama, and the calling thread writes results to
+SQLite. While an embedding request is in flight the reader keeps chunking
+and the writer keeps committing, so wall time tracks the slowest stage
+rather than the sum of all three. Every stage spends its wait time in
+socket or SQLite calls that release the GIL, so plain threads suffice.
+"""
+
+import logging
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from src.chunker import Chunk
+from src.config import EMBED_BATCH_SIZE, EMBED_CONCURRENCY, VECTOR_DB
+from src.embed import get_embedding, get_embeddings_batch
+from src.vectordb import filter_new_chunks, insert_chunks
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on rows per insert transaction; smaller flushes happen whenever
+# the writer would otherwise sit idle
+_COMMIT_EVERY = 256
+
+_DONE = object()
+
+
+def _batched(chunks: Iterable[Chunk], size: int) -> Iterator[list[Chunk]]:
+    batch: list[Chunk] = []
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _embed_batch(
+    batch: list[Chunk], label: str, db_path: Path = VECTOR_DB
+) -> list[tuple[Chunk, list[float]]]:
+    """Embed a batch of chunks in one request, returning (chunk, embedding) pairs.
+
+    Chunks already stored unchanged are skipped before any embedding call.
+    If the batched request fails, fall back to embedding each chunk on its
+    own so a single bad chunk doesn't drop the rest of the batch.
+    """
+    batch = filter_new_chunks(batch, db_path)
+    if not batch:
+        return []
+    try:
+        embeddings = get_embeddings_batch([c.text for c in batch], db_path=db_path)
+        return list(zip(batch, embeddings))
+    except Exception as e:
+        logger.warning(
+            "Batch embedding failed for %d %s(s), retrying one at a time: %s",
+            len(batch), label, e,
+        )
+
+    pairs = []
+    for chunk in batch:
+        try:
+            embedding = get_embedding(chunk.text, db_path=db_path)
+        except Exception as e:
+            logger.warning(
+                "Embedding failed for %s (%s, %s): %s",
+                label, chunk.contact, chunk.start_time.strftime("%Y-%m-%d %H:%M"), e,
+            )
+            continue
+        pairs.append((chunk, embedding))
+    return pairs
+
+
+def ingest_chunks(
+    chunks: Iterable[Chunk],
+    label: str = "chunk",
+    db_path: Path = VECTOR_DB,
+    on_stored: Callable[[list[Chunk]], None] | None = None,
+    should_stop: Callable[[], bool] | None = None,
+) -> int:
+    """Embed and store `chunks`, overlapping extraction, embedding and inserts.
+
+    `on_stored` is called from the writer with each committed group of
+    chunks. Once `should_stop()` returns true no further batches are read
+    and queued ones are drained unembedded; batches already being embedded
+    are still stored.
+
+    Returns the number of chunks written. Errors raised by the `chunks`
+    iterable or by the DB writer are re-raised here once all threads stop.
+    """
+    q_embed: queue.Queue = queue.Queue(maxsize=EMBED_CONCURRENCY * 2)
+    q_insert: queue.Queue = queue.Queue(maxsize=EMBED_CONCURRENCY * 2)
+    stop = threading.Event()  # set if the writer fails; upstream stages wind down
+    errors: list[BaseException] = []
+
+    def produce() -> None:
+        try:
+            for batch in _batched(chunks, EMBED_BATCH_SIZE):
+                if stop.is_set() or (should_stop and should_stop()):
+                    break
+                q_embed.put(batch)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            for _ in range(EMBED_CONCURRENCY):
+                q_embed.put(_DONE)
+
+    def embed() -> None:
+        while (batch := q_embed.get()) is not _DONE:
+            if stop.is_set() or (should_stop and should_stop()):
+                continue  # keep draining so the producer never blocks
+            try:
+                q_insert.put(_embed_batch(batch, label, db_path))
+            except Exception:
+                logger.exception("Dropping %s batch of %d", label, len(batch))
+        q_insert.put(_DONE)
+
+    threads = [threading.Thread(target=produce, daemon=True)]
+    threads += [threading.Thread(target=embed, daemon=True) for _ in range(EMBED_CONCURRENCY)]
+    for t in threads:
+        t.start()
+
+    stored = 0
+    pending: list[tuple[Chunk, list[float]]] = []
+    finished = 0
+    while finished < EMBED_CONCURRENCY:
+        item = q_insert.get()
+        if item is _DONE:
+            finished += 1
+        elif not stop.is_set():
+            pending.extend(item)
+        if pending and (len(pending) >= _COMMIT_EVERY or q_insert.empty()):
+            try:
+                insert_chunks(pending, db_path)
+                stored += len(pending)
+                if on_stored:
+                    on_stored([c for c, _ in pending])
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            pending = []
+
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+    return stored
@@ -1,32 +1,139 @@
 """Semantic search over the vector DB and LLM-powered answer generation."""
 
+import asyncio
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Generator
+from functools import lru_cache
+from typing import AsyncGenerator, Generator
 
-from src.generate import generate_once, stream_chat
+from src import settings
+from src.config import VECTOR_DB
+from src.generate import astream_chat, generate_once, stream_chat
 from src.embed import get_embedding
-from src.vectordb import fetch_by_ids, search
+from src.semantic_cache import SemanticCache
+from src.vectordb import chunks_version, fetch_by_ids, search
+
+# Answers to near-identical questions are replayed instead of regenerated
+_ANSWER_CACHE = SemanticCache()
+
+# Word-sized pieces (with their trailing whitespace) for replaying a cached answer
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+# Follow-up rewrites run here while the raw message is retrieved. A rewrite
+# gives up (HTTP timeout) soon after the wait below, so an abandoned one
+# frees its worker instead of holding it for the full generate timeout.
+# A rewrite that differs from the message costs a second embed + search.
+_REFORMULATE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="reformulate")
+# Seconds to wait for a rewrite before answering from the raw message's results
+_REFORMULATE_WAIT = 3.0
+
+# Follow-up turns usually retrieve the same chunks; reuse their system message.
+# Keyed on (chunk id, similarity) in context order, dropped when the DB changes.
+_SYSTEM_MSG_CACHE: OrderedDict[tuple, str] = OrderedDict()
+_SYSTEM_MSG_CACHE_SIZE = 256
+_system_msg_sig: tuple | None = None
+_system_msg_lock = threading.Lock()
 
 
 def retrieve(query: str, top_k: int = 5, source: str | None = None) -> list[dict]:
-    """Embed the query and return the top-k matching chunks."""
-    query_embedding = get_embedding(query)
+    """Embed the query and return the top-k matching chunks.
+
+    Query embeddings skip the on-disk embedding cache (db_path=None): that
+    cache exists for re-ingests, and one-off question texts would only grow
+    it without bound.
+    """
+    query_embedding = get_embedding(query, db_path=None)
     return search(query_embedding, top_k=top_k, source=source)
 
 
+def _cache_key(mode: str, top_k: int, source: str | None) -> tuple:
+    """Scope cached answers to everything besides the query that shapes them."""
+    return (
+        mode, top_k, source,
+        settings.get_generation_backend(), settings.get_generation_model(),
+    )
+
+
+def _replay(entry) -> list[dict]:
+    """Events for a cached answer, in the same sequence as a live one."""
+    events = [{"type": "sources", "data": entry.sources}]
+    for token in _TOKEN_RE.findall(entry.answer):
+        events.append({"type": "token", "data": token})
+    events.append({"type": "done", "data": ""})
+    return events
+
+
+@dataclass
+class _AnswerPlan:
+    """Result of the blocking retrieval half of an answer.
+
+    `events` are emitted first (sources, an error, or a whole cached
+    answer). If `messages` is set, tokens are then generated from it, and
+    the finished answer is cached under `cache` = (embedding, key, query,
+    sources) when given.
+    """
+    events: list[dict]
+    messages: list[dict] | None = None
+    cache: tuple | None = None
+
+
+def _run_plan(plan: _AnswerPlan) -> Generator[dict, None, None]:
+    yield from plan.events
+    if plan.messages is None:
+        return
+
+    answer = []
+    try:
+        for token in stream_chat(plan.messages):
+            answer.append(token)
+            yield {"type": "token", "data": token}
+    except Exception as e:
+        yield {"type": "error", "data": f"Generation failed: {e}"}
+        return
+
+    if plan.cache is not None:
+        _ANSWER_CACHE.insert(*plan.cache, "".join(answer))
+    yield {"type": "done", "data": ""}
+
+
+async def _arun_plan(plan: _AnswerPlan) -> AsyncGenerator[dict, None]:
+    for event in plan.events:
+        yield event
+    if plan.messages is None:
+        return
+
+    answer = []
+    try:
+        async for token in astream_chat(plan.messages):
+            answer.append(token)
+            yield {"type": "token", "data": token}
+    except Exception as e:
+        yield {"type": "error", "data": f"Generation failed: {e}"}
+        return
+
+    if plan.cache is not None:
+        _ANSWER_CACHE.insert(*plan.cache, "".join(answer))
+    yield {"type": "done", "data": ""}
+
+
+@lru_cache(maxsize=4096)
+def _fmt_ts(ts: float, fmt: str) -> str:
+    """strftime a UTC epoch timestamp; chat turns re-format the same chunks."""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime(fmt)
+
+
 def _format_context(results: list[dict]) -> str:
     """Format retrieved chunks into a context block for the LLM."""
-    parts = []
-    for i, r in enumerate(results, 1):
-        start = datetime.fromtimestamp(r["start_time"], tz=timezone.utc)
-        end = datetime.fromtimestamp(r["end_time"], tz=timezone.utc)
-        header = (
-            f"[Chunk {i} | {r['source']} | {r['contact']} | "
-            f"{start.strftime('%Y-%m-%d %H:%M')}–{end.strftime('%H:%M')} | "
-            f"{r['message_count']} messages | similarity: {r['similarity']:.3f}]"
-        )
-        parts.append(f"{header}\n{r['text']}")
-    return "\n\n---\n\n".join(parts)
+    return "\n\n---\n\n".join(
+        f"[Chunk {i} | {r['source']} | {r['contact']} | "
+        f"{_fmt_ts(r['start_time'], '%Y-%m-%d %H:%M')}–{_fmt_ts(r['end_time'], '%H:%M')} | "
+        f"{r['message_count']} messages | similarity: {r['similarity']:.3f}]\n{r['text']}"
+        for i, r in enumerate(results, 1)
+    )
 
 
 def _build_prompt(query: str, context: str) -> str:
@@ -46,27 +153,27 @@ def _build_prompt(query: str, context: str) -> str:
     )
 
 
-def stream_answer(
-    query: str, top_k: int = 5, source: str | None = None
-) -> Generator[dict, None, None]:
-    """Retrieve chunks and stream an answer as event dicts.
+def _plan_answer(query: str, top_k: int, source: str | None) -> _AnswerPlan:
+    try:
+        query_embedding = get_embedding(query, db_path=None)  # see retrieve()
+    except Exception as e:
+        return _AnswerPlan([{"type": "error", "data": f"Retrieval failed: {e}"}])
+
+    cache_key = _cache_key("answer", top_k, source)
+    cached = _ANSWER_CACHE.lookup(query_embedding, cache_key)
+    if cached is not None:
+        return _AnswerPlan(_replay(cached))
 
-    Yields dicts with:
-      {"type": "sources", "data": [list of result dicts]}
-      {"type": "token",   "data": "text fragment"}
-      {"type": "done",    "data": ""}
-      {"type": "error",   "data": "error message"}
-    """
     try:
-        results = retrieve(query, top_k=top_k, source=source)
+        results = search(query_embedding, top_k=top_k, source=source)
     except Exception as e:
-        yield {"type": "error", "data": f"Retrieval failed: {e}"}
-        return
+        return _AnswerPlan([{"type": "error", "data": f"Retrieval failed: {e}"}])
 
     if not results:
-        yield {"type": "sources", "data": []}
-        yield {"type": "error", "data": "No matching chunks found. Have you run 'ingest' yet?"}
-        return
+        return _AnswerPlan([
+            {"type": "sources", "data": []},
+            {"type": "error", "data": "No matching chunks found. Have you run 'ingest' yet?"},
+        ])
 
     # Strip embedding blobs before sending to client
     safe_results = []
@@ -82,31 +189,53 @@ def stream_answer(
             "text": r["text"][:300],
             "metadata": r.get("metadata", {}),
         })
-    yield {"type": "sources", "data": safe_results}
 
     context = _format_context(results)
     prompt = _build_prompt(query, context)
-    messages = [{"role": "user", "content": prompt}]
+    return _AnswerPlan(
+        [{"type": "sources", "data": safe_results}],
+        messages=[{"role": "user", "content": prompt}],
+        cache=(query_embedding, cache_key, query, safe_results),
+    )
 
-    try:
-        for token in stream_chat(messages):
-            yield {"type": "token", "data": token}
-    except Exception as e:
-        yield {"type": "error", "data": f"Generation failed: {e}"}
-        return
 
-    yield {"type": "done", "data": ""}
+def stream_answer(
+    query: str, top_k: int = 5, source: str | None = None
+) -> Generator[dict, None, None]:
+    """Retrieve chunks and stream an answer as event dicts.
+
+    Yields dicts with:
+      {"type": "sources", "data": [list of result dicts]}
+      {"type": "token",   "data": "text fragment"}
+      {"type": "done",    "data": ""}
+      {"type": "error",   "data": "error message"}
+    """
+    yield from _run_plan(_plan_answer(query, top_k, source))
+
+
+async def astream_answer(
+    query: str, top_k: int = 5, source: str | None = None
+) -> AsyncGenerator[dict, None]:
+    """Async stream_answer() for the web server.
+
+    Retrieval (embedding call + matmul) runs in a worker thread; generation
+    is streamed on the event loop.
+    """
+    plan = await asyncio.to_thread(_plan_answer, query, top_k, source)
+    async for event in _arun_plan(plan):
+        yield event
 
 
 def reformulate_query(
-    user_msg: str, history: list[dict],
+    user_msg: str, history: list[dict], timeout: float = 30,
 ) -> str:
     """Rewrite a follow-up question as a standalone search query.
 
     Uses the configured generation backend to combine conversation context
     with the new message so that vector-search retrieval works on follow-ups
     like "tell me more about that".
-    If there's no history, returns the original message unchanged.
+    If there's no history, returns the original message unchanged, as it
+    does when the backend fails or takes longer than `timeout` seconds.
     """
     if not history:
         return user_msg
@@ -128,41 +257,94 @@ def reformulate_query(
     )
 
     try:
-        rewritten = generate_once(prompt)
+        rewritten = generate_once(prompt, timeout=timeout)
         return rewritten if rewritten else user_msg
     except Exception:
         return user_msg
 
 
-def stream_answer_chat(
-    user_msg: str,
-    history: list[dict],
-    top_k: int = 5,
-    source: str | None = None,
-    prior_chunk_ids: list[int] | None = None,
-) -> Generator[dict, None, None]:
-    """Multi-turn chat: reformulate → retrieve → merge prior chunks → stream.
+def _chat_system_message(results: list[dict]) -> str:
+    """System prompt with the formatted excerpts, cached across chat turns."""
+    global _system_msg_sig
+    key = tuple((r["id"], r["similarity"]) for r in results)
+    sig = chunks_version(VECTOR_DB)
+    with _system_msg_lock:
+        if sig != _system_msg_sig:
+            _SYSTEM_MSG_CACHE.clear()
+            _system_msg_sig = sig
+        cached = _SYSTEM_MSG_CACHE.get(key)
+        if cached is not None:
+            _SYSTEM_MSG_CACHE.move_to_end(key)
+            return cached
 
-    Args:
-        user_msg: The latest user message.
-        history: Prior turns as [{"role": "user"|"assistant", "content": "..."}].
-        top_k: Number of chunks to retrieve.
-        source: Optional source filter.
-        prior_chunk_ids: Chunk IDs from earlier turns to carry forward.
+    system_msg = (
+        "You are a search assistant for the user's personal messages and emails. "
+        "Your ONLY job is to find and quote relevant parts from the excerpts below.\n\n"
+        "RULES:\n"
+        "- ONLY use information from the excerpts. NEVER use your own knowledge.\n"
+        "- Quote or paraphrase the actual messages. Include who said it and when.\n"
+        "- If the excerpts contain nothing relevant, say \"Nothing found in your "
+        "messages about this.\" Do NOT explain the topic yourself.\n"
+        "- Do NOT define terms, give background info, or answer from general knowledge.\n\n"
+        f"--- CONVERSATION EXCERPTS ---\n{_format_context(results)}\n"
+        f"--- END EXCERPTS ---"
+    )
+    with _system_msg_lock:
+        _SYSTEM_MSG_CACHE[key] = system_msg
+        if len(_SYSTEM_MSG_CACHE) > _SYSTEM_MSG_CACHE_SIZE:
+            _SYSTEM_MSG_CACHE.popitem(last=False)
+    return system_msg
 
-    Yields the same event dict format as stream_answer().
-    """
+
+def _plan_chat(
+    user_msg: str,
+    history: list[dict],
+    top_k: int,
+    source: str | None,
+    prior_chunk_ids: list[int] | None,
+) -> _AnswerPlan:
     MAX_CONTEXT_CHUNKS = 20
 
-    # Step 1 — reformulate follow-up into standalone retrieval query
-    search_query = reformulate_query(user_msg, history)
+    # Step 1 — start reformulating the follow-up into a standalone query;
+    # retrieval for the raw message runs meanwhile instead of waiting on it
+    rewrite = (
+        _REFORMULATE_POOL.submit(
+            reformulate_query, user_msg, history, timeout=_REFORMULATE_WAIT
+        )
+        if history else None
+    )
 
     # Step 2 — retrieve new chunks for this turn
     try:
-        new_results = retrieve(search_query, top_k=top_k, source=source)
+        query_embedding = get_embedding(user_msg, db_path=None)  # see retrieve()
     except Exception as e:
-        yield {"type": "error", "data": f"Retrieval failed: {e}"}
-        return
+        return _AnswerPlan([{"type": "error", "data": f"Retrieval failed: {e}"}])
+
+    # Only an opening turn is fully determined by the query; later turns
+    # also depend on history and carried-forward chunks
+    cacheable = not history and not prior_chunk_ids
+    cache_key = _cache_key("chat", top_k, source)
+    if cacheable:
+        cached = _ANSWER_CACHE.lookup(query_embedding, cache_key)
+        if cached is not None:
+            return _AnswerPlan(_replay(cached))
+
+    try:
+        new_results = search(query_embedding, top_k=top_k, source=source)
+    except Exception as e:
+        return _AnswerPlan([{"type": "error", "data": f"Retrieval failed: {e}"}])
+
+    # Prefer the rewrite if it lands in time; otherwise keep the raw results
+    if rewrite is not None:
+        try:
+            search_query = rewrite.result(timeout=_REFORMULATE_WAIT)
+        except TimeoutError:
+            search_query = user_msg
+        if search_query != user_msg:
+            try:
+                new_results = retrieve(search_query, top_k=top_k, source=source)
+            except Exception as e:
+                return _AnswerPlan([{"type": "error", "data": f"Retrieval failed: {e}"}])
 
     # Step 3 — merge with prior chunks (deduplicate by ID)
     new_ids = {r["id"] for r in new_results}
@@ -183,9 +365,10 @@ def stream_answer_chat(
     all_results = all_results[:MAX_CONTEXT_CHUNKS]
 
     if not all_results:
-        yield {"type": "sources", "data": []}
-        yield {"type": "error", "data": "No matching chunks found. Have you run 'ingest' yet?"}
-        return
+        return _AnswerPlan([
+            {"type": "sources", "data": []},
+            {"type": "error", "data": "No matching chunks found. Have you run 'ingest' yet?"},
+        ])
 
     # Send source info to client (includes IDs so browser can accumulate)
     safe_results = []
@@ -202,23 +385,9 @@ def stream_answer_chat(
             "metadata": r.get("metadata", {}),
             "is_new": r["id"] in new_ids,
         })
-    yield {"type": "sources", "data": safe_results}
 
     # Step 4 — build messages array for chat completion
-    context = _format_context(all_results)
-
-    system_msg = (
-        "You are a search assistant for the user's personal messages and emails. "
-        "Your ONLY job is to find and quote relevant parts from the excerpts below.\n\n"
-        "RULES:\n"
-        "- ONLY use information from the excerpts. NEVER use your own knowledge.\n"
-        "- Quote or paraphrase the actual messages. Include who said it and when.\n"
-        "- If the excerpts contain nothing relevant, say \"Nothing found in your "
-        "messages about this.\" Do NOT explain the topic yourself.\n"
-        "- Do NOT define terms, give background info, or answer from general knowledge.\n\n"
-        f"--- CONVERSATION EXCERPTS ---\n{context}\n"
-        f"--- END EXCERPTS ---"
-    )
+    system_msg = _chat_system_message(all_results)
 
     messages = [{"role": "system", "content": system_msg}]
 
@@ -228,14 +397,47 @@ def stream_answer_chat(
 
     messages.append({"role": "user", "content": user_msg})
 
-    try:
-        for token in stream_chat(messages):
-            yield {"type": "token", "data": token}
-    except Exception as e:
-        yield {"type": "error", "data": f"Generation failed: {e}"}
-        return
+    return _AnswerPlan(
+        [{"type": "sources", "data": safe_results}],
+        messages=messages,
+        cache=(query_embedding, cache_key, user_msg, safe_results) if cacheable else None,
+    )
 
-    yield {"type": "done", "data": ""}
+
+def stream_answer_chat(
+    user_msg: str,
+    history: list[dict],
+    top_k: int = 5,
+    source: str | None = None,
+    prior_chunk_ids: list[int] | None = None,
+) -> Generator[dict, None, None]:
+    """Multi-turn chat: reformulate ∥ retrieve → merge prior chunks → stream.
+
+    Args:
+        user_msg: The latest user message.
+        history: Prior turns as [{"role": "user"|"assistant", "content": "..."}].
+        top_k: Number of chunks to retrieve.
+        source: Optional source filter.
+        prior_chunk_ids: Chunk IDs from earlier turns to carry forward.
+
+    Yields the same event dict format as stream_answer().
+    """
+    yield from _run_plan(_plan_chat(user_msg, history, top_k, source, prior_chunk_ids))
+
+
+async def astream_answer_chat(
+    user_msg: str,
+    history: list[dict],
+    top_k: int = 5,
+    source: str | None = None,
+    prior_chunk_ids: list[int] | None = None,
+) -> AsyncGenerator[dict, None]:
+    """Async stream_answer_chat() for the web server; see astream_answer()."""
+    plan = await asyncio.to_thread(
+        _plan_chat, user_msg, history, top_k, source, prior_chunk_ids
+    )
+    async for event in _arun_plan(plan):
+        yield event
 
 
 def generate_answer(query: str, top_k: int = 5, source: str | None = None) -> None:
@@ -0,0 +1,118 @@
+"""In-memory semantic cache of generated answers, keyed by query embedding.
+
+A rephrased question ("dinner plans with Sam?" vs "what were Sam's dinner
+plans") embeds to nearly the same vector, so its answer can be replayed
+instead of paying for another LLM generation. Entries are scoped by a
+caller-supplied key (mode, source filter, top_k, model) and the whole
+cache is dropped whenever chunks are written to the vector DB.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from src.config import VECTOR_DB
+from src.vectordb import EMBEDDING_DIM, chunks_version
+
+
+@dataclass
+class _Entry:
+    key: tuple
+    query: str
+    sources: list[dict]
+    answer: str
+    created: float
+    last_used: float
+
+
+class SemanticCache:
+    """Fixed-capacity LRU of answers with per-entry TTL.
+
+    Lookup is one matrix-vector product over the cached (unit-norm) query
+    embeddings; a hit needs cosine similarity >= `threshold` and a matching
+    key. Safe to use from the web server's worker threads.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 256,
+        ttl: float = 3600.0,
+        threshold: float = 0.97,
+        db_path: Path = VECTOR_DB,
+    ):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.threshold = threshold
+        self.db_path = db_path
+        self._vecs = np.zeros((capacity, EMBEDDING_DIM), dtype=np.float32)
+        self._entries: list[_Entry | None] = [None] * capacity
+        # Read on first lookup/insert, so constructing a cache (at import
+        # time, for the module-level one in src.query) never opens the DB
+        self._db_sig: tuple | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(embedding: list[float]) -> np.ndarray | None:
+        vec = np.array(embedding, dtype=np.float32)
+        if vec.shape != (EMBEDDING_DIM,):
+            return None
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else None
+
+    def _check_db(self) -> None:
+        """Drop everything if chunks were added or changed since caching."""
+        sig = chunks_version(self.db_path)
+        if sig != self._db_sig:
+            self._entries = [None] * self.capacity
+            self._db_sig = sig
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = [None] * self.capacity
+
+    def lookup(self, embedding: list[float], key: tuple) -> _Entry | None:
+        """Return the closest live entry for `key`, or None on a miss."""
+        vec = self._unit(embedding)
+        if vec is None:
+            return None
+        now = time.time()
+        with self._lock:
+            self._check_db()
+            live = np.array([
+                e is not None and e.key == key and now - e.created < self.ttl
+                for e in self._entries
+            ])
+            if not live.any():
+                return None
+            sims = np.where(live, self._vecs @ vec, -np.inf)
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold:
+                return None
+            entry = self._entries[best]
+            entry.last_used = now
+            return entry
+
+    def insert(
+        self, embedding: list[float], key: tuple, query: str,
+        sources: list[dict], answer: str,
+    ) -> None:
+        """Store an answer, evicting an empty, expired or least recently used slot."""
+        vec = self._unit(embedding)
+        if vec is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._check_db()
+            slot = min(
+                range(self.capacity),
+                key=lambda i: (
+                    -1.0 if self._entries[i] is None
+                    or now - self._entries[i].created >= self.ttl
+                    else self._entries[i].last_used
+                ),
+            )
+            self._vecs[slot] = vec
+            self._entries[slot] = _Entry(key, query, sources, answer, now, now)
@@ -8,6 +8,8 @@ import json
 import os
 from pathlib import Path
 
+import orjson
+
 from src.config import (
     GENERATION_API_KEY,
     GENERATION_API_URL,
@@ -20,22 +22,29 @@ _SETTINGS_PATH = Path(os.path.expanduser("~/.personal-rag/settings.json"))
 
 _cache: dict | None = None
 _cache_mtime: float = 0.0
+# (settings dict it was built from, its mtime, get_all() result)
+_all_cache: tuple[dict, float, dict] | None = None
 
 
 def _load() -> dict:
-    """Read settings.json with mtime-based cache to avoid redundant disk reads."""
+    """Read settings.json with mtime-based cache to avoid redundant disk reads.
+
+    One stat() per call; the file is only re-parsed when its mtime changes.
+    """
     global _cache, _cache_mtime
 
-    if not _SETTINGS_PATH.exists():
-        _cache = {}
-        _cache_mtime = 0.0
+    try:
+        mtime = os.stat(_SETTINGS_PATH).st_mtime
+    except FileNotFoundError:
+        if _cache is None or _cache_mtime != 0.0:
+            _cache = {}
+            _cache_mtime = 0.0
         return _cache
 
-    mtime = _SETTINGS_PATH.stat().st_mtime
     if _cache is not None and mtime == _cache_mtime:
         return _cache
 
-    _cache = json.loads(_SETTINGS_PATH.read_text())
+    _cache = orjson.loads(_SETTINGS_PATH.read_bytes())
     _cache_mtime = mtime
     return _cache
 
@@ -55,8 +64,9 @@ def save(data: dict) -> None:
     _SETTINGS_PATH.chmod(0o600)
 
     # Bust cache so next read picks up changes
-    global _cache, _cache_mtime
+    global _cache, _cache_mtime, _all_cache
     _cache = existing
+    _all_cache = None
     _cache_mtime = _SETTINGS_PATH.stat().st_mtime
 
 
@@ -78,9 +88,15 @@ def get_generation_api_key() -> str:
 
 def get_all() -> dict:
     """Return all effective generation settings (saved values with env fallbacks)."""
-    return {
-        "generation_backend": get_generation_backend(),
-        "generation_model": get_generation_model(),
-        "generation_api_url": get_generation_api_url(),
-        "generation_api_key": get_generation_api_key(),
+    global _all_cache
+    data = _load()
+    if _all_cache is not None and _all_cache[0] is data and _all_cache[1] == _cache_mtime:
+        return dict(_all_cache[2])
+    result = {
+        "generation_backend": data.get("generation_backend") or GENERATION_BACKEND,
+        "generation_model": data.get("generation_model") or GENERATION_MODEL,
+        "generation_api_url": data.get("generation_api_url") or GENERATION_API_URL,
+        "generation_api_key": data.get("generation_api_key") or GENERATION_API_KEY,
     }
+    _all_cache = (data, _cache_mtime, result)
+    return dict(result)
@@ -0,0 +1,16 @@
+"""Parsing of relative time windows shared by the CLI and web UI."""
+
+from datetime import datetime, timedelta, timezone
+
+
+def parse_since(value: str) -> datetime:
+    """Parse a relative time like '30d', '7d', '24h' into a UTC datetime."""
+    unit = value[-1].lower()
+    amount = int(value[:-1])
+    now = datetime.now(tz=timezone.utc)
+    if unit == "d":
+        return now - timedelta(days=amount)
+    elif unit == "h":
+        return now - timedelta(hours=amount)
+    else:
+        raise ValueError(f"Unknown time unit '{unit}'. Use 'd' (days) or 'h' (hours).")
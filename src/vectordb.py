@@ -1,21 +1,102 @@
 """SQLite-backed vector database with numpy cosine similarity search."""
 
+import atexit
 import json
 import sqlite3
+import threading
+import weakref
 from pathlib import Path
+from typing import NamedTuple
 
 import numpy as np
+import orjson
 
 from src.chunker import Chunk
-from src.config import VECTOR_DB
+from src.config import ANN_MIN_CHUNKS, EMBED_STORAGE_DTYPE, VECTOR_DB, VECTOR_SEARCH
+
+try:
+    import hnswlib
+except ImportError:  # optional: pip install 'personal-rag[ann]'
+    hnswlib = None
 
 EMBEDDING_DIM = 768  # nomic-embed-text
 
+_STORAGE_DTYPE = np.float16 if EMBED_STORAGE_DTYPE == "float16" else np.float32
+
+
+def _decode_embedding(blob: bytes) -> np.ndarray | None:
+    """Decode a stored embedding to float32, whichever precision it was saved in.
+
+    The dtype is inferred from the blob size so DBs written before a change of
+    EMBED_STORAGE_DTYPE keep working. Returns None for a wrong-dimension blob.
+    """
+    if len(blob) == EMBEDDING_DIM * 4:
+        return np.frombuffer(blob, dtype=np.float32, count=EMBEDDING_DIM)
+    if len(blob) == EMBEDDING_DIM * 2:
+        return np.frombuffer(blob, dtype=np.float16, count=EMBEDDING_DIM).astype(np.float32)
+    return None
+
+
+def _unit_rows(mat: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length in place; zero rows are left as-is."""
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    mat /= np.where(norms > 0, norms, 1.0)
+    return mat
+
+
+def _encode_rows(embs: np.ndarray) -> np.ndarray:
+    """Unit-normalize float32 rows and convert them to the storage dtype."""
+    return _unit_rows(embs).astype(_STORAGE_DTYPE)
+
+
+def _normalize_stored(conn: sqlite3.Connection, batch: int = 4096) -> None:
+    """Migration: rewrite embeddings stored before insert-time normalization."""
+    cursor = conn.execute("SELECT id, embedding FROM chunks WHERE embedding IS NOT NULL")
+    with conn:
+        while rows := cursor.fetchmany(batch):
+            decoded = [(cid, _decode_embedding(blob)) for cid, blob in rows]
+            decoded = [(cid, emb) for cid, emb in decoded if emb is not None]
+            if not decoded:
+                continue
+            stored = _encode_rows(np.stack([emb for _, emb in decoded]))
+            conn.executemany(
+                "UPDATE chunks SET embedding = ? WHERE id = ?",
+                [(stored[i].tobytes(), cid) for i, (cid, _) in enumerate(decoded)],
+            )
+        _bump_chunks_version(conn)
+
+
+def _drop_int8_columns(conn: sqlite3.Connection) -> None:
+    """Migration: remove the embedding_i8/embedding_scale columns, if present.
+
+    Searching a widened int8 copy turned out slower than float32 and the
+    copy grew every row, so it is no longer written or read.
+    """
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(chunks)")}
+    with conn:
+        for col in ("embedding_i8", "embedding_scale"):
+            if col not in cols:
+                continue
+            try:
+                conn.execute(f"ALTER TABLE chunks DROP COLUMN {col}")
+            except sqlite3.OperationalError:
+                # SQLite < 3.35 has no DROP COLUMN; at least free the bytes
+                conn.execute(f"UPDATE chunks SET {col} = NULL")
+
+
+def _bump_chunks_version(conn: sqlite3.Connection) -> None:
+    """Record a write to chunks; call inside the writing transaction."""
+    conn.execute("UPDATE chunks_version SET version = version + 1 WHERE id = 0")
+
 
 def _ensure_db(db_path: Path = VECTOR_DB) -> sqlite3.Connection:
     """Create the DB and table if they don't exist."""
     db_path.parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(str(db_path))
+    # WAL keeps readers unblocked during ingest; NORMAL sync is durable
+    # under WAL and avoids an fsync on every commit.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
     conn.execute("""
         CREATE TABLE IF NOT EXISTS chunks (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -39,48 +120,386 @@ def _ensure_db(db_path: Path = VECTOR_DB) -> sqlite3.Connection:
     conn.execute("""
         CREATE INDEX IF NOT EXISTS idx_chunks_contact ON chunks(contact)
     """)
+    # Migration: cache keys switched from SHA-256 to blake3, so old entries
+    # can never hit again — drop the table rather than carry dead rows.
+    cache_cols = {r[1] for r in conn.execute("PRAGMA table_info(embedding_cache)")}
+    if "sha256" in cache_cols:
+        conn.execute("DROP TABLE embedding_cache")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS embedding_cache (
+            text_hash BLOB NOT NULL,
+            model TEXT NOT NULL,
+            vec BLOB NOT NULL,
+            PRIMARY KEY (text_hash, model)
+        ) WITHOUT ROWID
+    """)
     # Migration: add metadata column for existing DBs
     try:
         conn.execute("ALTER TABLE chunks ADD COLUMN metadata TEXT")
     except sqlite3.OperationalError:
         pass  # column already exists
+    # Write counter for the chunks table; see chunks_version()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS chunks_version (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            version INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO chunks_version (id, version) VALUES (0, 0)")
+    # Email identity lookup for skipping already-ingested messages
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_chunks_message_id
+        ON chunks(json_extract(metadata, '$.message_id'))
+        WHERE source = 'email'
+    """)
     conn.commit()
+    # Migration: embeddings are stored unit-norm from schema version 1 on
+    user_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if user_version < 1:
+        _normalize_stored(conn)
+        conn.execute("PRAGMA user_version = 1")
+    # Migration: schema version 2 drops the int8 embedding copy
+    if user_version < 2:
+        _drop_int8_columns(conn)
+        conn.execute("PRAGMA user_version = 2")
     return conn
 
 
-def insert_chunk(chunk: Chunk, embedding: list[float], db_path: Path = VECTOR_DB) -> int:
-    """Insert a chunk with its embedding. Returns the row ID."""
+class _ThreadConnections:
+    """One thread's open connections: {db path: (inode, connection)}."""
+
+    def __init__(self):
+        self.conns: dict[str, tuple[int, sqlite3.Connection]] = {}
+
+    def close(self) -> None:
+        for _, conn in self.conns.values():
+            conn.close()
+        self.conns.clear()
+
+
+_local = threading.local()
+# Lets the atexit hook reach every thread's connections; entries vanish
+# (and their connections are closed by GC) when a thread exits
+_all_thread_conns: "weakref.WeakSet[_ThreadConnections]" = weakref.WeakSet()
+_all_lock = threading.Lock()
+
+
+def _get_conn(db_path: Path = VECTOR_DB) -> sqlite3.Connection:
+    """Return this thread's connection to `db_path`, opening it on first use.
+
+    Schema setup and PRAGMAs run once per thread rather than on every call.
+    Reopens if the DB file has been deleted or replaced since.
+    """
+    holder = getattr(_local, "conns", None)
+    if holder is None:
+        holder = _local.conns = _ThreadConnections()
+        with _all_lock:
+            _all_thread_conns.add(holder)
+
+    key = str(db_path)
+    cached = holder.conns.get(key)
+    if cached is not None:
+        try:
+            if db_path.stat().st_ino == cached[0]:
+                return cached[1]
+        except FileNotFoundError:
+            pass
+        cached[1].close()
+        del holder.conns[key]
+
     conn = _ensure_db(db_path)
-    try:
-        emb_blob = np.array(embedding, dtype=np.float32).tobytes()
-        meta_json = json.dumps(chunk.metadata) if chunk.metadata else None
-        cursor = conn.execute(
-            """
-            INSERT INTO chunks (source, contact, start_time, end_time, text, message_count, embedding, metadata)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(source, contact, start_time) DO UPDATE SET
-                end_time = excluded.end_time,
-                text = excluded.text,
-                message_count = excluded.message_count,
-                embedding = excluded.embedding,
-                metadata = excluded.metadata,
-                created_at = unixepoch()
-            """,
+    # Serve embedding BLOB reads from the page cache via mmap, and keep
+    # a 64MB page cache and temp tables in memory
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.create_function("cosine", 2, _sql_cosine, deterministic=True)
+    holder.conns[key] = (db_path.stat().st_ino, conn)
+    return conn
+
+
+@atexit.register
+def _close_all() -> None:
+    with _all_lock:
+        holders = list(_all_thread_conns)
+    for holder in holders:
+        holder.close()
+
+
+_UPSERT_SQL = """
+    INSERT INTO chunks (source, contact, start_time, end_time, text, message_count,
+                        embedding, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(source, contact, start_time) DO UPDATE SET
+        end_time = excluded.end_time,
+        text = excluded.text,
+        message_count = excluded.message_count,
+        embedding = excluded.embedding,
+        metadata = excluded.metadata,
+        created_at = unixepoch()
+"""
+
+
+def _chunk_rows(items: list[tuple[Chunk, list[float]]]) -> list[tuple]:
+    """Build _UPSERT_SQL parameter tuples, encoding all embeddings in one pass.
+
+    Vectors are stored unit-norm, so cosine similarity is a plain dot product.
+    """
+    stored = _encode_rows(np.array([e for _, e in items], dtype=np.float32))
+    return [_chunk_row(chunk, stored[i].tobytes()) for i, (chunk, _) in enumerate(items)]
+
+
+def _chunk_row(chunk: Chunk, emb_blob: bytes) -> tuple:
+    meta_json = json.dumps(chunk.metadata) if chunk.metadata else None
+    return (
+        chunk.source,
+        chunk.contact,
+        chunk.start_time.timestamp(),
+        chunk.end_time.timestamp(),
+        chunk.text,
+        chunk.message_count,
+        emb_blob,
+        meta_json,
+    )
+
+
+def insert_chunk(chunk: Chunk, embedding: list[float], db_path: Path = VECTOR_DB) -> int:
+    """Insert a chunk with its embedding. Returns the row ID.
+
+    Thin wrapper over insert_chunks(); bulk callers should use that directly.
+    """
+    insert_chunks([(chunk, embedding)], db_path)
+    row = _get_conn(db_path).execute(
+        "SELECT id FROM chunks WHERE source = ? AND contact IS ? AND start_time = ?",
+        (chunk.source, chunk.contact, chunk.start_time.timestamp()),
+    ).fetchone()
+    return row[0]
+
+
+def insert_chunks(
+    items: list[tuple[Chunk, list[float]]], db_path: Path = VECTOR_DB
+) -> None:
+    """Insert many (chunk, embedding) pairs in a single transaction.
+
+    One executemany + one commit instead of a commit per row, so bulk
+    ingest pays for a single fsync per batch.
+    """
+    if not items:
+        return
+    conn = _get_conn(db_path)
+    with conn:
+        conn.executemany(_UPSERT_SQL, _chunk_rows(items))
+        _bump_chunks_version(conn)
+
+
+def _is_stored(conn: sqlite3.Connection, chunk: Chunk) -> bool:
+    """True if this exact chunk is already stored (same window and message count).
+
+    Emails with a Message-ID are matched on that instead.
+    """
+    message_id = chunk.metadata.get("message_id") if chunk.source == "email" else None
+    if message_id:
+        row = conn.execute(
+            "SELECT 1 FROM chunks WHERE source = 'email' "
+            "AND json_extract(metadata, '$.message_id') = ? LIMIT 1",
+            (message_id,),
+        ).fetchone()
+    else:
+        # Served by the (source, contact, start_time) dedup index
+        row = conn.execute(
+            "SELECT 1 FROM chunks WHERE source = ? AND contact = ? AND start_time = ? "
+            "AND end_time = ? AND message_count = ? LIMIT 1",
             (
                 chunk.source,
                 chunk.contact,
                 chunk.start_time.timestamp(),
                 chunk.end_time.timestamp(),
-                chunk.text,
                 chunk.message_count,
-                emb_blob,
-                meta_json,
             ),
+        ).fetchone()
+    return row is not None
+
+
+def filter_new_chunks(chunks: list[Chunk], db_path: Path = VECTOR_DB) -> list[Chunk]:
+    """Drop chunks that are already stored unchanged, so they aren't re-embedded."""
+    if not chunks:
+        return []
+    conn = _get_conn(db_path)
+    return [c for c in chunks if not _is_stored(conn, c)]
+
+
+class _Matrix(NamedTuple):
+    """All stored embeddings as one float32 matrix, with per-row lookups."""
+    ids: np.ndarray           # (N,) int64 chunk ids
+    mat: np.ndarray           # (N, EMBEDDING_DIM) float32, unit-norm rows
+    source_codes: np.ndarray  # (N,) index into `sources`
+    sources: tuple[str, ...]
+
+    def source_mask(self, source: str) -> np.ndarray | None:
+        """Boolean row mask for `source`, or None if no rows have it."""
+        if source not in self.sources:
+            return None
+        return self.source_codes == self.sources.index(source)
+
+
+# db_path -> (chunks version, matrix); one matrix serves every source filter
+_MATRIX_CACHE: dict[str, tuple[tuple, _Matrix]] = {}
+
+
+def chunks_version(db_path: Path) -> tuple[int, int] | None:
+    """Change detector for the chunks table: (DB file inode, write counter).
+
+    Unlike the file's mtime this ignores embedding_cache writes. The inode
+    catches a DB that was deleted and rebuilt, whose counter restarts at 0.
+    None if the DB doesn't exist yet.
+    """
+    if not db_path.exists():
+        return None
+    conn = _get_conn(db_path)
+    version = conn.execute("SELECT version FROM chunks_version").fetchone()[0]
+    return db_path.stat().st_ino, version
+
+
+def _load_matrix(db_path: Path) -> _Matrix:
+    """Read all embeddings into one contiguous (N, EMBEDDING_DIM) float32 matrix.
+
+    Rows are re-normalized after widening from the storage dtype, so a
+    query scores with a single sgemv. Zero and wrong-dimension vectors
+    are dropped.
+    """
+    conn = _get_conn(db_path)
+    rows = conn.execute(
+        "SELECT id, source, embedding FROM chunks WHERE embedding IS NOT NULL"
+    ).fetchall()
+
+    ids = np.empty(len(rows), dtype=np.int64)
+    mat = np.empty((len(rows), EMBEDDING_DIM), dtype=np.float32)
+    codes = np.empty(len(rows), dtype=np.int16)
+    sources: dict[str, int] = {}
+    n = 0
+    for chunk_id, source, blob in rows:
+        emb = _decode_embedding(blob)
+        if emb is None:
+            continue
+        mat[n] = emb
+        ids[n] = chunk_id
+        codes[n] = sources.setdefault(source, len(sources))
+        n += 1
+    ids, mat, codes = ids[:n], mat[:n], codes[:n]
+
+    valid = mat.any(axis=1)
+    return _Matrix(ids[valid], _unit_rows(mat[valid]), codes[valid], tuple(sources))
+
+
+def _get_matrix(db_path: Path) -> _Matrix:
+    """Return the cached embedding matrix, reloading it if chunks have changed."""
+    key = str(db_path)
+    sig = chunks_version(db_path)
+    cached = _MATRIX_CACHE.get(key)
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    matrix = _load_matrix(db_path)
+    _MATRIX_CACHE[key] = (sig, matrix)
+    return matrix
+
+
+# db_path -> (chunks version, HNSW index, sync watermark) for corpora of
+# ANN_MIN_CHUNKS or more
+_ANN_CACHE: dict[str, tuple[tuple, "hnswlib.Index", "_AnnWatermark"]] = {}
+_ann_lock = threading.Lock()
+
+
+class _AnnWatermark(NamedTuple):
+    """How far the HNSW index has been synced."""
+    last_id: int      # highest chunk id added; new rows have larger ids
+    synced_at: float  # DB clock when the last sync started; upserts stamp created_at
+
+
+_ANN_START = _AnnWatermark(-1, float("-inf"))
+
+
+def _ann_paths(db_path: Path) -> tuple[Path, Path]:
+    """The on-disk HNSW index and its sync watermark, stored next to the DB."""
+    return db_path.with_suffix(".hnsw"), db_path.with_suffix(".hnsw.json")
+
+
+def _sync_ann_index(
+    db_path: Path, index: "hnswlib.Index | None", watermark: _AnnWatermark
+) -> tuple["hnswlib.Index | None", _AnnWatermark]:
+    """Load the HNSW index if needed and add rows written since `watermark`.
+
+    Returns (None, watermark) when the corpus is below ANN_MIN_CHUNKS.
+    New rows are found by id; upserted rows keep their id, so they are
+    found by the created_at stamp the upsert refreshes. That test is >=
+    so a write in the same second as the last sync isn't missed, which
+    can re-add (replace) a few rows but never leaves the set stuck
+    non-empty: each sync moves synced_at forward. The index files are
+    rewritten only when rows were added.
+    """
+    conn = _get_conn(db_path)
+    count = conn.execute(
+        "SELECT COUNT(*) FROM chunks WHERE embedding IS NOT NULL"
+    ).fetchone()[0]
+    if count < ANN_MIN_CHUNKS:
+        return None, watermark
+
+    index_path, state_path = _ann_paths(db_path)
+    if index is None:
+        index = hnswlib.Index(space="cosine", dim=EMBEDDING_DIM)
+        state = json.loads(state_path.read_text()) if state_path.exists() else {}
+        if index_path.exists() and "last_id" in state:
+            index.load_index(str(index_path), max_elements=count)
+            watermark = _AnnWatermark(state["last_id"], state["synced_at"])
+        else:
+            index.init_index(max_elements=count, ef_construction=200, M=16)
+            watermark = _ANN_START
+
+    synced_at = conn.execute("SELECT unixepoch()").fetchone()[0]
+    rows = conn.execute(
+        "SELECT id, embedding FROM chunks "
+        "WHERE embedding IS NOT NULL AND (id > ? OR created_at >= ?)",
+        (watermark.last_id, watermark.synced_at),
+    ).fetchall()
+    ids, vecs = [], []
+    for chunk_id, blob in rows:
+        emb = _decode_embedding(blob)
+        if emb is not None and emb.any():
+            ids.append(chunk_id)
+            vecs.append(emb)
+    last_id = max([watermark.last_id, *(r[0] for r in rows)])
+    watermark = _AnnWatermark(last_id, synced_at)
+    if ids:
+        needed = index.get_current_count() + len(ids)
+        if needed > index.get_max_elements():
+            index.resize_index(int(needed * 1.25))
+        index.add_items(np.stack(vecs), np.array(ids, dtype=np.int64))
+        index.save_index(str(index_path))
+        state_path.write_text(json.dumps(watermark._asdict()))
+    return index, watermark
+
+
+def _get_ann_index(db_path: Path) -> "hnswlib.Index | None":
+    """Return the HNSW index for `db_path`, syncing it if chunks have changed.
+
+    None means use the exact scan: hnswlib isn't installed or the corpus
+    is still small.
+    """
+    if hnswlib is None:
+        return None
+    with _ann_lock:
+        key = str(db_path)
+        sig = chunks_version(db_path)
+        cached = _ANN_CACHE.get(key)
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+        index, watermark = _sync_ann_index(
+            db_path, cached[1] if cached else None, cached[2] if cached else _ANN_START
         )
-        conn.commit()
-        return cursor.lastrowid
-    finally:
-        conn.close()
+        if index is None:
+            _ANN_CACHE.pop(key, None)
+        else:
+            _ANN_CACHE[key] = (sig, index, watermark)
+        return index
 
 
 def search(
@@ -89,88 +508,165 @@ def search(
     source: str | None = None,
     db_path: Path = VECTOR_DB,
 ) -> list[dict]:
-    """Find the top-k most similar chunks by cosine similarity."""
+    """Find the top-k most similar chunks by cosine similarity.
+
+    Scores every chunk against an in-memory float32 embedding matrix that
+    is only rebuilt when chunks are written. Unfiltered searches over a
+    corpus of ANN_MIN_CHUNKS or more use an HNSW index instead, when
+    hnswlib is installed. With VECTOR_SEARCH=sql, ranking runs inside
+    SQLite and no matrix is kept in memory.
+    """
     top_k = max(1, min(top_k, 50))
-    conn = _ensure_db(db_path)
-    try:
-        where = "WHERE embedding IS NOT NULL"
-        params: list = []
-        if source:
-            where += " AND source = ?"
-            params.append(source)
 
-        rows = conn.execute(
-            f"SELECT id, source, contact, start_time, end_time, text, message_count, embedding, metadata FROM chunks {where}",
-            params,
-        ).fetchall()
+    query_vec = np.array(query_embedding, dtype=np.float32)
+    if query_vec.shape != (EMBEDDING_DIM,):
+        return []
+    query_norm = np.linalg.norm(query_vec)
+    if query_norm == 0:
+        return []
 
-        if not rows:
-            return []
+    index = _get_ann_index(db_path) if source is None else None
+    if index is not None:
+        k = min(top_k, index.get_current_count())
+        index.set_ef(max(64, k * 2))
+        labels, distances = index.knn_query(query_vec, k=k)
+        return _with_rows(
+            [(int(i), float(1.0 - d)) for i, d in zip(labels[0], distances[0])], db_path
+        )
 
-        query_vec = np.array(query_embedding, dtype=np.float32)
-        query_norm = np.linalg.norm(query_vec)
-        if query_norm == 0:
-            return []
+    if VECTOR_SEARCH == "sql":
+        return _search_sql(query_vec / query_norm, top_k, source, db_path)
 
-        scored = []
-        for row in rows:
-            emb = np.frombuffer(row[7], dtype=np.float32)
-            if emb.shape != query_vec.shape:
-                continue
-            emb_norm = np.linalg.norm(emb)
-            if emb_norm == 0:
-                continue
-            similarity = float(np.dot(query_vec, emb) / (query_norm * emb_norm))
-            scored.append((similarity, row))
-
-        scored.sort(key=lambda x: x[0], reverse=True)
-
-        results = []
-        for sim, row in scored[:top_k]:
-            results.append({
-                "id": row[0],
-                "source": row[1],
-                "contact": row[2],
-                "start_time": row[3],
-                "end_time": row[4],
-                "text": row[5],
-                "message_count": row[6],
-                "similarity": sim,
-                "metadata": json.loads(row[8]) if row[8] else {},
-            })
-        return results
-    finally:
-        conn.close()
+    m = _get_matrix(db_path)
+    ids = m.ids
+    mask = m.source_mask(source) if source else None
+    if source and mask is None:
+        return []
+    candidates = len(ids) if mask is None else int(mask.sum())
+    if not candidates:
+        return []
+
+    sims = m.mat @ (query_vec / query_norm)
+    if mask is not None:
+        sims[~mask] = -np.inf
+
+    # O(N) selection of the top k, then sort just those k
+    k = min(top_k, candidates)
+    top = np.argpartition(-sims, k - 1)[:k]
+    order = top[np.argsort(-sims[top])]
+
+    return _with_rows([(int(ids[i]), float(sims[i])) for i in order], db_path)
+
+
+def _with_rows(scored: list[tuple[int, float]], db_path: Path) -> list[dict]:
+    """Fetch rows for (chunk id, similarity) pairs, keeping their order."""
+    by_id = {r["id"]: r for r in fetch_by_ids([i for i, _ in scored], db_path)}
+    results = []
+    for chunk_id, sim in scored:
+        r = by_id.get(chunk_id)
+        if r is None:
+            continue  # deleted since the matrix/index was loaded
+        r["similarity"] = sim
+        results.append(r)
+    return results
+
+
+def _sql_cosine(blob: bytes | None, query_blob: bytes) -> float | None:
+    """SQL function cosine(embedding, query): stored rows and the query are unit-norm."""
+    emb = _decode_embedding(blob) if blob is not None else None
+    if emb is None:
+        return None
+    return float(emb @ np.frombuffer(query_blob, dtype=np.float32))
+
+
+def _search_sql(
+    query_unit: np.ndarray, top_k: int, source: str | None, db_path: Path
+) -> list[dict]:
+    """Rank inside SQLite with the cosine() UDF instead of a cached matrix.
+
+    A memory-saving mode, not a speedup: nothing is held between searches,
+    but every query pays one UDF call per row.
+    """
+    where = "WHERE embedding IS NOT NULL"
+    params: list = [query_unit.astype(np.float32).tobytes()]
+    if source:
+        where += " AND source = ?"
+        params.append(source)
+    # Filtering on `s` in SQL would evaluate cosine() a second time per row;
+    # NULLs (wrong-dimension blobs) sort last under DESC and are dropped here
+    rows = _get_conn(db_path).execute(
+        f"SELECT id, cosine(embedding, ?) AS s FROM chunks {where} "
+        f"ORDER BY s DESC LIMIT ?",
+        [*params, top_k],
+    ).fetchall()
+    return _with_rows([(chunk_id, sim) for chunk_id, sim in rows if sim is not None], db_path)
 
 
 def fetch_by_ids(chunk_ids: list[int], db_path: Path = VECTOR_DB) -> list[dict]:
     """Fetch chunks by their row IDs. Returns them in the same dict format as search()."""
     if not chunk_ids:
         return []
-    conn = _ensure_db(db_path)
-    try:
-        placeholders = ",".join("?" for _ in chunk_ids)
+    conn = _get_conn(db_path)
+    placeholders = ",".join("?" for _ in chunk_ids)
+    rows = conn.execute(
+        f"SELECT id, source, contact, start_time, end_time, text, message_count, metadata "
+        f"FROM chunks WHERE id IN ({placeholders})",
+        chunk_ids,
+    ).fetchall()
+    return [
+        {
+            "id": r[0],
+            "source": r[1],
+            "contact": r[2],
+            "start_time": r[3],
+            "end_time": r[4],
+            "text": r[5],
+            "message_count": r[6],
+            "similarity": 0.0,  # not from a search, no score
+            "metadata": orjson.loads(r[7]) if r[7] else {},
+        }
+        for r in rows
+    ]
+
+
+def get_cached_embeddings(
+    keys: list[bytes], model: str, db_path: Path = VECTOR_DB
+) -> dict[bytes, list[float]]:
+    """Look up cached embeddings by content hash. Returns {key: vector} for hits."""
+    if not keys:
+        return {}
+    conn = _get_conn(db_path)
+    found: dict[bytes, list[float]] = {}
+    unique = list(dict.fromkeys(keys))
+    # Stay well under SQLite's bound-parameter limit
+    for i in range(0, len(unique), 500):
+        part = unique[i : i + 500]
+        placeholders = ",".join("?" for _ in part)
         rows = conn.execute(
-            f"SELECT id, source, contact, start_time, end_time, text, message_count, metadata "
-            f"FROM chunks WHERE id IN ({placeholders})",
-            chunk_ids,
+            f"SELECT text_hash, vec FROM embedding_cache "
+            f"WHERE model = ? AND text_hash IN ({placeholders})",
+            [model, *part],
         ).fetchall()
-        return [
-            {
-                "id": r[0],
-                "source": r[1],
-                "contact": r[2],
-                "start_time": r[3],
-                "end_time": r[4],
-                "text": r[5],
-                "message_count": r[6],
-                "similarity": 0.0,  # not from a search, no score
-                "metadata": json.loads(r[7]) if r[7] else {},
-            }
-            for r in rows
-        ]
-    finally:
-        conn.close()
+        for key, vec in rows:
+            found[bytes(key)] = np.frombuffer(vec, dtype=np.float32).tolist()
+    return found
+
+
+def cache_embeddings(
+    entries: dict[bytes, list[float]], model: str, db_path: Path = VECTOR_DB
+) -> None:
+    """Store embeddings keyed by content hash for reuse across ingest runs."""
+    if not entries:
+        return
+    conn = _get_conn(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO embedding_cache (text_hash, model, vec) VALUES (?, ?, ?)",
+            [
+                (key, model, np.array(vec, dtype=np.float32).tobytes())
+                for key, vec in entries.items()
+            ],
+        )
 
 
 def get_stats(db_path: Path = VECTOR_DB) -> dict:
@@ -178,17 +674,17 @@ def get_stats(db_path: Path = VECTOR_DB) -> dict:
     if not db_path.exists():
         return {"total_chunks": 0, "by_source": {}, "db_size_mb": 0}
 
-    conn = _ensure_db(db_path)
-    try:
-        total = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
-        sources = conn.execute(
-            "SELECT source, COUNT(*) FROM chunks GROUP BY source"
-        ).fetchall()
-        db_size = db_path.stat().st_size / (1024 * 1024)
-        return {
-            "total_chunks": total,
-            "by_source": {s: c for s, c in sources},
-            "db_size_mb": round(db_size, 2),
-        }
-    finally:
-        conn.close()
+    conn = _get_conn(db_path)
+    total = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+    sources = conn.execute(
+        "SELECT source, COUNT(*) FROM chunks GROUP BY source"
+    ).fetchall()
+    # Connections stay open, so recent writes may still sit in the WAL file
+    wal = db_path.with_name(db_path.name + "-wal")
+    db_bytes = db_path.stat().st_size + (wal.stat().st_size if wal.exists() else 0)
+    db_size = db_bytes / (1024 * 1024)
+    return {
+        "total_chunks": total,
+        "by_source": {s: c for s, c in sources},
+        "db_size_mb": round(db_size, 2),
+    }
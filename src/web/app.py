@@ -1,22 +1,28 @@
 """FastAPI application factory for the personal-rag web UI."""
 
+import asyncio
 import secrets
+from contextlib import asynccontextmanager
 from pathlib import Path
 from urllib.parse import urlparse
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import QueryParams
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from src.config import AUTH_TOKEN_PATH
+from src.generate import aclose_async_client
 
 _WEB_DIR = Path(__file__).resolve().parent
 
 templates = Jinja2Templates(directory=str(_WEB_DIR / "templates"))
 
-_ALLOWED_ORIGINS = {"http://127.0.0.1", "http://localhost"}
+# (scheme, host) pairs allowed to send state-changing requests
+_ALLOWED_ORIGINS = frozenset({("http", "127.0.0.1"), ("http", "localhost")})
+_UNSAFE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
 
 
 def _get_or_create_token() -> str:
@@ -32,45 +38,63 @@ def _get_or_create_token() -> str:
     return token
 
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    """Require a bearer token on all /api/ routes."""
+class AuthCSRFMiddleware:
+    """Reject state-changing requests from foreign origins, then require a
+    bearer token on all /api/ routes.
 
-    def __init__(self, app, token: str):
-        super().__init__(app)
+    Plain ASGI rather than BaseHTTPMiddleware, so an allowed request costs
+    a header lookup and a direct call into the app, with no extra task or
+    stream wrapping around every response (notably SSE token streams).
+    """
+
+    def __init__(self, app: ASGIApp, token: str):
+        self.app = app
         self.token = token
+        self.bearer = f"Bearer {token}".encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next):
-        if request.url.path.startswith("/api/"):
-            # Check Authorization header
-            auth = request.headers.get("authorization", "")
-            if auth == f"Bearer {self.token}":
-                return await call_next(request)
-            # Check query parameter
-            if request.query_params.get("token") == self.token:
-                return await call_next(request)
-            return JSONResponse({"detail": "Unauthorized"}, status_code=401)
-        return await call_next(request)
-
-
-class CSRFMiddleware(BaseHTTPMiddleware):
-    """Reject POST requests from foreign origins."""
-
-    async def dispatch(self, request: Request, call_next):
-        if request.method == "POST":
-            origin = request.headers.get("origin") or request.headers.get("referer")
+        headers = dict(scope["headers"])  # ASGI header names are lowercase bytes
+        if scope["method"] in _UNSAFE_METHODS:
+            origin = headers.get(b"origin") or headers.get(b"referer")
             if origin:
-                parsed = urlparse(origin)
-                origin_base = f"{parsed.scheme}://{parsed.hostname}"
-                if origin_base not in _ALLOWED_ORIGINS:
-                    return JSONResponse(
+                parsed = urlparse(origin.decode("latin-1"))
+                if (parsed.scheme, parsed.hostname) not in _ALLOWED_ORIGINS:
+                    response = JSONResponse(
                         {"detail": "CSRF check failed: origin not allowed"},
                         status_code=403,
                     )
-        return await call_next(request)
+                    await response(scope, receive, send)
+                    return
+
+        if scope["path"].startswith("/api/"):
+            # Authorization header, or token query parameter (EventSource can't set headers)
+            if (
+                headers.get(b"authorization") != self.bearer
+                and QueryParams(scope["query_string"]).get("token") != self.token
+            ):
+                response = JSONResponse({"detail": "Unauthorized"}, status_code=401)
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    from src.web.routes.status import run_health_checks
+
+    health_task = asyncio.create_task(run_health_checks())
+    yield
+    health_task.cancel()
+    await aclose_async_client()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Personal RAG", docs_url=None, redoc_url=None)
+    app = FastAPI(title="Personal RAG", docs_url=None, redoc_url=None, lifespan=_lifespan)
 
     token = _get_or_create_token()
 
@@ -78,9 +102,8 @@ def create_app() -> FastAPI:
     app.state.auth_token = token
     templates.env.globals["auth_token"] = token
 
-    # Middleware is applied in reverse order — CSRF first, then auth
-    app.add_middleware(AuthMiddleware, token=token)
-    app.add_middleware(CSRFMiddleware)
+    # CSRF origin check first, then auth
+    app.add_middleware(AuthCSRFMiddleware, token=token)
 
     app.mount(
         "/static",
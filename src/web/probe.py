@@ -0,0 +1,104 @@
+"""Short-lived cache for backend health probes (Ollama /api/tags, /models).
+
+The dashboard, its refresh poll and the settings page all probe the same
+URLs; within `ttl` seconds they share one HTTP round-trip. If a refresh
+fails, the last good response is served instead (stale-if-error) so one
+dropped request doesn't flip the dashboard to offline, but only for
+`max_stale` seconds: a backend that stays down shows as down.
+"""
+
+import threading
+import time
+from functools import lru_cache
+
+import orjson
+import requests as http_requests
+from requests.adapters import HTTPAdapter
+
+from src.config import OLLAMA_URL
+
+_PROBE_TTL = 10.0
+_MAX_STALE = 3 * _PROBE_TTL
+
+# Probes reuse keep-alive sockets instead of a fresh TCP (and TLS, for a
+# remote backend) handshake each time. Auth headers stay per request since
+# Ollama and the generation backend may be different hosts.
+_SESSION = http_requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+_SESSION.mount("http://", _adapter)
+_SESSION.mount("https://", _adapter)
+
+# (url, authorization header) -> (fetched at, monotonic; parsed JSON body)
+_CACHE: dict[tuple[str, str | None], tuple[float, object]] = {}
+_lock = threading.Lock()
+
+
+def cached_get_json(
+    url: str,
+    headers: dict | None = None,
+    ttl: float = _PROBE_TTL,
+    stale_ok: bool = True,
+    max_stale: float = _MAX_STALE,
+):
+    """GET `url` and return its JSON body, reusing a response younger than `ttl`.
+
+    On a failed request the last cached body is returned if `stale_ok` and
+    it is younger than `max_stale`; otherwise the error propagates.
+    """
+    key = (url, (headers or {}).get("Authorization"))
+    now = time.monotonic()
+    with _lock:
+        hit = _CACHE.get(key)
+    if hit is not None and now - hit[0] < ttl:
+        return hit[1]
+
+    try:
+        resp = _SESSION.get(url, headers=headers, timeout=5)
+        resp.raise_for_status()
+        body = orjson.loads(resp.content)
+    except (http_requests.RequestException, orjson.JSONDecodeError):
+        # A 200 with a non-JSON body is a misbehaving backend, not a crash
+        if stale_ok and hit is not None and now - hit[0] < max_stale:
+            return hit[1]
+        raise
+
+    with _lock:
+        _CACHE[key] = (time.monotonic(), body)
+    return body
+
+
+# (parsed /api/tags body, model names) for the body last converted
+_models_memo: tuple[object, tuple[str, ...]] | None = None
+
+
+def ollama_models(stale_ok: bool = True) -> tuple[str, ...]:
+    """Model tags installed in Ollama, from the cached /api/tags response."""
+    global _models_memo
+    body = cached_get_json(f"{OLLAMA_URL}/api/tags", stale_ok=stale_ok)
+    memo = _models_memo
+    if memo is not None and memo[0] is body:
+        return memo[1]
+    names = tuple(m["name"] for m in body.get("models", []))
+    _models_memo = (body, names)
+    return names
+
+
+@lru_cache(maxsize=8)
+def _name_set(models: tuple[str, ...]) -> frozenset[str]:
+    return frozenset(models)
+
+
+def has_model(models: tuple[str, ...], model: str) -> bool:
+    """True if `model` is installed. A bare name like "llama3" means
+    "llama3:latest", as it does to Ollama itself."""
+    if not model:
+        return False
+    names = _name_set(models)
+    return model in names or (":" not in model and f"{model}:latest" in names)
+
+
+def clear() -> None:
+    global _models_memo
+    with _lock:
+        _CACHE.clear()
+        _models_memo = None
@@ -1,7 +1,7 @@
 """Ingest routes — start/monitor/cancel ingestion tasks."""
 
 from fastapi import APIRouter, Form, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 
 from src.web.app import templates
 from src.web.tasks import task_manager
@@ -40,8 +40,17 @@ async def ingest_progress(request: Request, task_id: str):
     task = task_manager.get(task_id)
     if not task:
         return HTMLResponse("<p>Task not found.</p>")
+    # Polled every 2s while running; skip the render when nothing moved.
+    # htmx 2 would swap a 304's empty body, but with no-cache the browser
+    # sends If-None-Match itself and hands htmx a 200 with the cached card
+    status, chunks, messages, failed = task.progress_snapshot()
+    etag = f'"{task.id}-{status}-{chunks}-{messages}-{int(failed)}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
     return templates.TemplateResponse(
-        "partials/ingest_progress.html", {"request": request, "task": task}
+        "partials/ingest_progress.html", {"request": request, "task": task},
+        headers=headers,
     )
 
 
@@ -1,12 +1,11 @@
 """Query routes — search page, SSE streaming, and multi-turn chat."""
 
-import json
-
+import orjson
 from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
-from src.query import retrieve, stream_answer, stream_answer_chat
+from src.query import astream_answer, astream_answer_chat, retrieve
 from src.vectordb import fetch_by_ids
 from src.web.app import templates
 
@@ -14,6 +13,14 @@ router = APIRouter()
 
 MAX_TOP_K = 50
 
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+
+
+def _sse_frame(event: dict) -> bytes:
+    """Encode one event as an SSE frame, as bytes so Starlette sends it as-is."""
+    return _SSE_PREFIX + orjson.dumps(event, default=str) + _SSE_SUFFIX
+
 
 class ChatRequest(BaseModel):
     query: str
@@ -35,10 +42,9 @@ async def query_stream(q: str, top_k: int = 5, source: str | None = None):
     if source == "":
         source = None
 
-    def event_generator():
-        for event in stream_answer(q, top_k=top_k, source=source):
-            payload = json.dumps(event, default=str)
-            yield f"data: {payload}\n\n"
+    async def event_generator():
+        async for event in astream_answer(q, top_k=top_k, source=source):
+            yield _sse_frame(event)
 
     return StreamingResponse(
         event_generator(),
@@ -52,13 +58,12 @@ async def chat_stream(req: ChatRequest):
     """SSE endpoint for multi-turn chat with conversation history."""
     source = req.source if req.source else None
 
-    def event_generator():
-        for event in stream_answer_chat(
+    async def event_generator():
+        async for event in astream_answer_chat(
             req.query, req.history, top_k=req.top_k, source=source,
             prior_chunk_ids=req.prior_chunk_ids,
         ):
-            payload = json.dumps(event, default=str)
-            yield f"data: {payload}\n\n"
+            yield _sse_frame(event)
 
     return StreamingResponse(
         event_generator(),
@@ -1,25 +1,24 @@
 """Settings routes — configure generation backend from the web UI."""
 
-import requests as http_requests
-
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
 
 from src import settings
-from src.config import OLLAMA_URL
 from src.web.app import templates
+from src.web.probe import cached_get_json, has_model, ollama_models
 
 router = APIRouter()
 
 
 def _test_backend(backend: str, model: str, api_url: str, api_key: str) -> str:
-    """Probe the configured backend and return a status message."""
+    """Probe the configured backend and return a status message.
+
+    Fresh probes are reused, but a failure is never masked by a stale one.
+    """
     try:
         if backend == "ollama":
-            resp = http_requests.get(f"{OLLAMA_URL}/api/tags", timeout=5)
-            resp.raise_for_status()
-            models = [m["name"] for m in resp.json().get("models", [])]
-            if any(model in m for m in models):
+            models = ollama_models(stale_ok=False)
+            if has_model(models, model):
                 return f"Ollama online — model '{model}' ready."
             return f"Ollama online — but model '{model}' not found. Available: {', '.join(models)}"
         else:
@@ -27,8 +26,7 @@ def _test_backend(backend: str, model: str, api_url: str, api_key: str) -> str:
             headers = {"Content-Type": "application/json"}
             if api_key:
                 headers["Authorization"] = f"Bearer {api_key}"
-            resp = http_requests.get(f"{api_url}/models", headers=headers, timeout=5)
-            resp.raise_for_status()
+            cached_get_json(f"{api_url}/models", headers=headers, stale_ok=False)
             return f"Backend online at {api_url}."
     except Exception as e:
         return f"Connection failed: {e}"
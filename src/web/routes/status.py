@@ -1,52 +1,56 @@
 """Status routes — dashboard with vector DB stats and Ollama health."""
 
-import requests as http_requests
+import asyncio
+import hashlib
+import logging
+import threading
+import time
 
 from fastapi import APIRouter, Request
+from fastapi.responses import Response
 
 from src import settings
-from src.config import EMBED_MODEL, OLLAMA_URL
-from src.vectordb import get_stats
+from src.config import EMBED_MODEL, HEALTH_CHECK_INTERVAL, VECTOR_DB
+from src.vectordb import chunks_version, get_stats
 from src.web.app import templates
+from src.web.probe import cached_get_json, has_model, ollama_models
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Upper bound on any one dashboard check; the probes' own HTTP timeout is 5s
+_CHECK_TIMEOUT = 6.0
+
 
-def _check_ollama() -> dict:
+def _check_ollama(current: dict) -> dict:
     """Check Ollama connectivity and available models."""
-    gen_backend = settings.get_generation_backend()
-    gen_model = settings.get_generation_model()
+    gen_backend = current["generation_backend"]
+    gen_model = current["generation_model"]
     try:
-        resp = http_requests.get(f"{OLLAMA_URL}/api/tags", timeout=5)
-        resp.raise_for_status()
-        models = [m["name"] for m in resp.json().get("models", [])]
+        models = ollama_models()
         gen_via_ollama = gen_backend == "ollama"
         return {
             "status": "online",
-            "models": models,
-            "has_embed": any(EMBED_MODEL in m for m in models),
-            "has_gen": any(gen_model in m for m in models) if gen_via_ollama else None,
+            "models": list(models),
+            "has_embed": has_model(models, EMBED_MODEL),
+            "has_gen": has_model(models, gen_model) if gen_via_ollama else None,
         }
     except Exception as e:
         return {"status": "offline", "error": str(e), "models": [], "has_embed": False, "has_gen": None}
 
 
-def _check_generation_backend() -> dict:
+def _check_generation_backend(current: dict) -> dict:
     """Check the configured generation backend."""
-    gen_backend = settings.get_generation_backend()
-    gen_model = settings.get_generation_model()
-    gen_api_url = settings.get_generation_api_url()
-
-    info = {"backend": gen_backend, "model": gen_model}
+    info = {"backend": current["generation_backend"], "model": current["generation_model"]}
 
-    if gen_backend == "ollama":
-        info["status"] = "via_ollama"
+    if info["backend"] == "ollama":
+        info["status"] = "via_ollama"  # covered by _check_ollama; nothing to probe
         return info
 
     # OpenAI-compatible backend — probe /models endpoint
     try:
-        resp = http_requests.get(f"{gen_api_url}/models", timeout=5)
-        resp.raise_for_status()
+        cached_get_json(f"{current['generation_api_url']}/models")
         info["status"] = "online"
     except Exception as e:
         info["status"] = "offline"
@@ -55,21 +59,125 @@ def _check_generation_backend() -> dict:
     return info
 
 
+class _HealthState:
+    """Last Ollama / generation-backend probe results, refreshed in the background.
+
+    Status requests read the snapshot instead of probing, so the page no
+    longer waits on (or multiplies load against) the backends.
+    """
+
+    def __init__(self) -> None:
+        self._state: dict | None = None
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> dict | None:
+        with self._lock:
+            return self._state
+
+    async def refresh(self) -> dict:
+        """Probe both backends concurrently; a probe that overruns is reported offline."""
+        async def run(check, on_timeout):
+            try:
+                return await asyncio.wait_for(
+                    asyncio.to_thread(check, current), _CHECK_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                return on_timeout
+
+        current = settings.get_all()  # one settings read for both checks
+        timeout_error = f"timed out after {_CHECK_TIMEOUT:.0f}s"
+        ollama_check = run(_check_ollama, {
+            "status": "offline", "error": timeout_error,
+            "models": [], "has_embed": False, "has_gen": None,
+        })
+        if current["generation_backend"] == "ollama":
+            # Generation rides on the Ollama probe; no second thread needed
+            ollama = await ollama_check
+            generation = _check_generation_backend(current)
+        else:
+            ollama, generation = await asyncio.gather(
+                ollama_check,
+                run(_check_generation_backend, {
+                    "backend": current["generation_backend"],
+                    "model": current["generation_model"],
+                    "status": "offline", "error": timeout_error,
+                }),
+            )
+        state = {"ollama": ollama, "generation": generation, "updated_at": time.time()}
+        with self._lock:
+            self._state = state
+        return state
+
+
+health_state = _HealthState()
+
+
+async def run_health_checks(interval: float = HEALTH_CHECK_INTERVAL) -> None:
+    """Refresh health_state every `interval` seconds until cancelled."""
+    while True:
+        try:
+            await health_state.refresh()
+        except Exception:
+            logger.exception("Health check failed")
+        await asyncio.sleep(interval)
+
+
+async def _current_health() -> dict:
+    """The latest health snapshot.
+
+    Probes synchronously only before the first background refresh, or when
+    the generation settings changed since the snapshot was taken.
+    """
+    health = health_state.snapshot()
+    current = settings.get_all()
+    if (
+        health is None
+        or health["generation"]["backend"] != current["generation_backend"]
+        or health["generation"]["model"] != current["generation_model"]
+    ):
+        health = await health_state.refresh()
+    return health
+
+
+async def _gather_status(health: dict | None = None) -> dict:
+    """DB stats plus the latest health snapshot."""
+    health = health or await _current_health()
+    stats = await asyncio.to_thread(get_stats)
+    return {"stats": stats, "ollama": health["ollama"], "generation": health["generation"]}
+
+
+def _status_etag(health: dict, version: tuple | None) -> str:
+    """Validator for the status cards: health results plus the chunks version.
+
+    Chunk counts only move when chunks are written, so an unchanged version
+    means stats need not be re-queried to know the cards are the same.
+    Ingest-time embedding-cache writes don't change it; the DB size card
+    catches up on the next chunk write or page load.
+    """
+    raw = repr((health["ollama"], health["generation"], version))
+    return '"' + hashlib.blake2b(raw.encode(), digest_size=8).hexdigest() + '"'
+
+
 @router.get("/status")
 async def status_page(request: Request):
-    stats = get_stats()
-    ollama = _check_ollama()
-    generation = _check_generation_backend()
     return templates.TemplateResponse(
-        "status.html", {"request": request, "stats": stats, "ollama": ollama, "generation": generation}
+        "status.html", {"request": request, **await _gather_status()}
     )
 
 
 @router.get("/status/api/refresh")
 async def status_refresh(request: Request):
-    stats = get_stats()
-    ollama = _check_ollama()
-    generation = _check_generation_backend()
+    # Polled by the dashboard; when nothing changed, answer 304 before
+    # querying stats or rendering the partial. The browser revalidates its
+    # cached copy and gives htmx a 200 with that body; see ingest_progress()
+    health = await _current_health()
+    version = await asyncio.to_thread(chunks_version, VECTOR_DB)  # SQLite read
+    etag = _status_etag(health, version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
     return templates.TemplateResponse(
-        "partials/status_cards.html", {"request": request, "stats": stats, "ollama": ollama, "generation": generation}
+        "partials/status_cards.html",
+        {"request": request, **await _gather_status(health)},
+        headers=headers,
     )
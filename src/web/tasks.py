@@ -1,12 +1,19 @@
 """Background task management for long-running ingestions."""
 
+import itertools
+import secrets
 import threading
 import time
-import uuid
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
 
+from src.chunker import chunk_emails, chunk_imessages
+from src.ingest.email import extract_emails
+from src.ingest.imessage import extract_messages
+from src.pipeline import ingest_chunks
+from src.timeutils import parse_since
+
 
 class TaskStatus(str, Enum):
     PENDING = "pending"
@@ -33,6 +40,14 @@ class IngestTask:
     def request_cancel(self) -> None:
         self.cancel_requested = True
 
+    def progress_snapshot(self) -> tuple[str, int, int, bool]:
+        """(status, chunks, messages, has error) — what the progress card shows."""
+        with self._lock:
+            return (
+                self.status.value, self.chunks_processed,
+                self.messages_processed, self.error is not None,
+            )
+
     def to_dict(self) -> dict:
         with self._lock:
             return {
@@ -52,6 +67,9 @@ class TaskManager:
     def __init__(self) -> None:
         self._tasks: dict[str, IngestTask] = {}
         self._lock = threading.Lock()
+        # Short task IDs that sort by start order; the random byte makes a
+        # stale ID from before a server restart unlikely to hit a new task
+        self._ids = itertools.count(1)
 
     def get(self, task_id: str) -> IngestTask | None:
         return self._tasks.get(task_id)
@@ -66,7 +84,9 @@ class TaskManager:
         )
 
     def start_ingest(self, source: str, since: str | None) -> IngestTask:
-        task = IngestTask(id=uuid.uuid4().hex[:8], source=source, since=since)
+        task = IngestTask(
+            id=f"{next(self._ids):06x}{secrets.token_hex(1)}", source=source, since=since
+        )
         with self._lock:
             self._tasks[task.id] = task
 
@@ -77,19 +97,12 @@ class TaskManager:
         return task
 
     def _run_ingest(self, task: IngestTask) -> None:
-        from src.chunker import chunk_emails, chunk_imessages
-        from src.embed import get_embedding
-        from src.ingest.email import extract_emails
-        from src.ingest.imessage import extract_messages
-        from src.vectordb import insert_chunk
-
         task.status = TaskStatus.RUNNING
         task.started_at = datetime.now(tz=timezone.utc)
 
         try:
             since_dt = None
             if task.since:
-                from cli import parse_since
                 since_dt = parse_since(task.since)
 
             if task.source == "imessage":
@@ -104,22 +117,22 @@ class TaskManager:
                 task.finished_at = datetime.now(tz=timezone.utc)
                 return
 
-            for chunk in chunks:
-                if task.cancel_requested:
-                    task.status = TaskStatus.CANCELLED
-                    task.finished_at = datetime.now(tz=timezone.utc)
-                    return
-
-                try:
-                    embedding = get_embedding(chunk.text)
-                except Exception:
-                    continue
-
-                insert_chunk(chunk, embedding)
-
+            def progress(stored: list) -> None:
                 with task._lock:
-                    task.chunks_processed += 1
-                    task.messages_processed += chunk.message_count
+                    task.chunks_processed += len(stored)
+                    task.messages_processed += sum(c.message_count for c in stored)
+
+            # Same threaded pipeline as the CLI: chunking, embedding and
+            # inserts overlap instead of running one after another
+            ingest_chunks(
+                chunks, task.source,
+                on_stored=progress,
+                should_stop=lambda: task.cancel_requested,
+            )
+            if task.cancel_requested:
+                task.status = TaskStatus.CANCELLED  # what was already embedded is kept
+                task.finished_at = datetime.now(tz=timezone.utc)
+                return
 
             task.status = TaskStatus.DONE
             task.finished_at = datetime.now(tz=timezone.utc)
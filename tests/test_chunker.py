@@ -4,7 +4,7 @@ from datetime import datetime, timedelta, timezone
 
 from src.chunker import Chunk, chunk_emails, chunk_imessages
 from src.ingest.email import RawEmail
-from src.ingest.imessage import RawMessage
+from src.ingest.imessage import RawMessage, datetime_to_apple_ts
 
 
 def _msg(contact, minutes_offset, text="Hi", is_from_me=False):
@@ -13,7 +13,7 @@ def _msg(contact, minutes_offset, text="Hi", is_from_me=False):
     return RawMessage(
         rowid=minutes_offset,
         text=text,
-        date=base + timedelta(minutes=minutes_offset),
+        date_ns=datetime_to_apple_ts(base + timedelta(minutes=minutes_offset)),
         is_from_me=is_from_me,
         contact=contact,
     )
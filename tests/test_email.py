@@ -124,6 +124,20 @@ class TestParseEmlx:
         # Should default to roughly now
         assert result.date.year >= 2024
 
+    def test_large_email_ignores_trailer(self, tmp_path):
+        """Files over the mmap threshold parse the same and skip the plist trailer."""
+        body = "Long line of text.\n" * 2000
+        emlx = tmp_path / "large.emlx"
+        _write_emlx(emlx, SIMPLE_EMAIL + "\n" + body)
+        with open(emlx, "ab") as f:
+            f.write(b"<?xml version=\"1.0\"?><plist>trailer</plist>")
+
+        result = _parse_emlx(emlx)
+        assert result is not None
+        assert result.subject == "Test Subject"
+        assert "Long line of text." in result.body
+        assert "plist" not in result.body
+
     def test_nonexistent_file(self, tmp_path):
         result = _parse_emlx(tmp_path / "missing.emlx")
         assert result is None
@@ -175,6 +189,24 @@ class TestExtractEmails:
         result = list(extract_emails(mail_dir=tmp_path))
         assert result == []
 
+    def test_nested_mailbox_under_unlisted_parent(self, tmp_path):
+        """Mailboxes nested under a non-matching parent are still found."""
+        nested = tmp_path / "acct" / "[Gmail].mbox" / "All Mail.mbox" / "Messages"
+        nested.mkdir(parents=True)
+        _write_emlx(nested / "1.emlx", SIMPLE_EMAIL)
+        _write_emlx(tmp_path / "acct" / "[Gmail].mbox" / "2.emlx", SIMPLE_EMAIL)
+
+        result = list(extract_emails(mail_dir=tmp_path))
+        assert len(result) == 1
+
+    def test_nested_allowed_mailbox_not_duplicated(self, tmp_path):
+        nested = tmp_path / "INBOX.mbox" / "Archive.mbox" / "Messages"
+        nested.mkdir(parents=True)
+        _write_emlx(nested / "1.emlx", SIMPLE_EMAIL)
+
+        result = list(extract_emails(mail_dir=tmp_path))
+        assert len(result) == 1
+
     def test_since_filter(self, tmp_path):
         inbox = tmp_path / "INBOX.mbox" / "Messages"
         inbox.mkdir(parents=True)
@@ -184,3 +216,14 @@ class TestExtractEmails:
         cutoff = datetime(2025, 1, 1, tzinfo=timezone.utc)
         result = list(extract_emails(since=cutoff, mail_dir=tmp_path))
         assert result == []
+
+    def test_parses_every_email(self, tmp_path):
+        """Parallel parsing still yields every email."""
+        inbox = tmp_path / "INBOX.mbox" / "Messages"
+        inbox.mkdir(parents=True)
+        for i in range(5):
+            _write_emlx(inbox / f"{i}.emlx",
+                        SIMPLE_EMAIL.replace("Test Subject", f"Subject {i}"))
+
+        result = list(extract_emails(mail_dir=tmp_path))
+        assert sorted(r.subject for r in result) == [f"Subject {i}" for i in range(5)]
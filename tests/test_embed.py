@@ -1,6 +1,15 @@
 """Tests for embedding text cleaning logic."""
 
-from src.embed import _clean, _MAX_CHARS
+from unittest.mock import MagicMock, patch
+
+from src.embed import _clean, _MAX_CHARS, get_embedding, get_embeddings_batch
+
+
+def _ok_response(embeddings):
+    resp = MagicMock()
+    resp.status_code = 200
+    resp.json.return_value = {"embeddings": embeddings}
+    return resp
 
 
 class TestClean:
@@ -24,3 +33,56 @@ class TestClean:
 
     def test_only_placeholders(self):
         assert _clean("\ufffc\ufffc\ufffc") == ""
+
+
+class TestGetEmbedding:
+    def test_uses_batched_endpoint(self, vector_db):
+        with patch("src.embed._SESSION.post") as mock_post:
+            mock_post.return_value = _ok_response([[0.5, 0.25]])
+            assert get_embedding("hi\ufffc", db_path=vector_db) == [0.5, 0.25]
+        assert mock_post.call_args.args[0].endswith("/api/embed")
+        assert mock_post.call_args.kwargs["json"]["input"] == ["hi"]
+
+
+class TestGetEmbeddingsBatch:
+    def test_empty_input_skips_request(self, vector_db):
+        with patch("src.embed._SESSION.post") as mock_post:
+            assert get_embeddings_batch([], db_path=vector_db) == []
+        mock_post.assert_not_called()
+
+    def test_single_request_for_batch(self, vector_db):
+        with patch("src.embed._SESSION.post") as mock_post:
+            mock_post.return_value = _ok_response([[1.0], [2.0], [3.0]])
+            result = get_embeddings_batch(["a", "b\ufffc", "c"], db_path=vector_db)
+        assert result == [[1.0], [2.0], [3.0]]
+        mock_post.assert_called_once()
+        payload = mock_post.call_args.kwargs["json"]
+        assert payload["input"] == ["a", "b", "c"]
+
+    def test_cached_texts_skip_request(self, vector_db):
+        with patch("src.embed._SESSION.post") as mock_post:
+            mock_post.return_value = _ok_response([[1.0], [2.0]])
+            get_embeddings_batch(["a", "b"], db_path=vector_db)
+
+            mock_post.reset_mock()
+            mock_post.return_value = _ok_response([[3.0]])
+            result = get_embeddings_batch(["b", "c", "a"], db_path=vector_db)
+
+        assert result == [[2.0], [3.0], [1.0]]
+        mock_post.assert_called_once()
+        assert mock_post.call_args.kwargs["json"]["input"] == ["c"]
+
+    def test_fully_cached_batch_makes_no_request(self, vector_db):
+        with patch("src.embed._SESSION.post") as mock_post:
+            mock_post.return_value = _ok_response([[1.0]])
+            get_embeddings_batch(["a"], db_path=vector_db)
+            mock_post.reset_mock()
+            assert get_embeddings_batch(["a"], db_path=vector_db) == [[1.0]]
+        mock_post.assert_not_called()
+
+    def test_duplicate_texts_sent_once(self, vector_db):
+        with patch("src.embed._SESSION.post") as mock_post:
+            mock_post.return_value = _ok_response([[1.0], [2.0]])
+            result = get_embeddings_batch(["a", "b", "a", "a"], db_path=vector_db)
+        assert result == [[1.0], [2.0], [1.0], [1.0]]
+        assert mock_post.call_args.kwargs["json"]["input"] == ["a", "b"]
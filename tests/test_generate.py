@@ -0,0 +1,96 @@
+"""Tests for streamed response parsing in the generation backends."""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import httpx
+
+from src.generate import (
+    _astream_chat_ollama,
+    _iter_lines,
+    _stream_chat_ollama,
+    _stream_chat_openai,
+    generate_once,
+)
+
+
+def _streaming_response(lines: list[bytes], chunk_size: int = 7) -> MagicMock:
+    """Mock response whose body arrives in small chunks that split lines."""
+    body = b"\n".join(lines) + b"\n"
+    resp = MagicMock()
+    resp.__enter__.return_value = resp
+    resp.iter_content.return_value = iter(
+        body[i : i + chunk_size] for i in range(0, len(body), chunk_size)
+    )
+    return resp
+
+
+class TestIterLines:
+    def test_reassembles_lines_across_chunks(self):
+        resp = MagicMock()
+        resp.iter_content.return_value = iter([b"ab", b"c\r\nde", b"\n\nf"])
+        assert list(_iter_lines(resp)) == [b"abc", b"de", b"", b"f"]
+
+    def test_crlf_without_final_newline(self):
+        resp = MagicMock()
+        resp.iter_content.return_value = iter([b'data: {"a": 1}\r\ndata: [DO', b"NE]\r"])
+        assert list(_iter_lines(resp)) == [b'data: {"a": 1}', b"data: [DONE]"]
+
+
+class TestStreamChatOllama:
+    @patch("src.generate._SESSION.post")
+    def test_yields_tokens_until_done(self, mock_post):
+        mock_post.return_value = _streaming_response([
+            b'{"message": {"content": "Hel"}, "done": false}',
+            b"",
+            b'{"message": {"content": "lo"}, "done": false}',
+            b'{"message": {"content": ""}, "done": true}',
+            b'{"message": {"content": "ignored"}, "done": false}',
+        ])
+        tokens = list(_stream_chat_ollama([{"role": "user", "content": "hi"}], "m"))
+        assert tokens == ["Hel", "lo"]
+
+
+class TestAsyncStreamChatOllama:
+    def test_yields_tokens_until_done(self):
+        body = (
+            b'{"message": {"content": "Hel"}, "done": false}\n'
+            b'{"message": {"content": "lo"}, "done": false}\n'
+            b'{"message": {"content": ""}, "done": true}\n'
+        )
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda req: httpx.Response(200, content=body))
+        )
+
+        async def collect():
+            async with client:
+                return [t async for t in _astream_chat_ollama([], "m")]
+
+        with patch("src.generate._ASYNC_CLIENT", client):
+            assert asyncio.run(collect()) == ["Hel", "lo"]
+
+
+class TestStreamChatOpenAI:
+    @patch("src.generate.settings.get_generation_api_key", return_value="")
+    @patch("src.generate.settings.get_generation_api_url", return_value="http://localhost:8080/v1")
+    @patch("src.generate._SESSION.post")
+    def test_parses_sse_until_done(self, mock_post, _url, _key):
+        mock_post.return_value = _streaming_response([
+            b": keep-alive",
+            b'data: {"choices": [{"delta": {"content": "Hi"}}]}',
+            b'data: {"choices": []}',
+            b'data: {"choices": [{"delta": {"content": " there"}}]}',
+            b"data: [DONE]",
+            b'data: {"choices": [{"delta": {"content": "ignored"}}]}',
+        ])
+        tokens = list(_stream_chat_openai([{"role": "user", "content": "hi"}], "m"))
+        assert tokens == ["Hi", " there"]
+
+
+class TestGenerateOnce:
+    @patch("src.generate.settings.get_generation_backend", return_value="ollama")
+    @patch("src.generate._SESSION.post")
+    def test_passes_timeout_to_request(self, mock_post, _backend):
+        mock_post.return_value.json.return_value = {"response": " standalone query "}
+        assert generate_once("p", model="m", timeout=3.0) == "standalone query"
+        assert mock_post.call_args.kwargs["timeout"] == 3.0
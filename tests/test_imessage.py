@@ -166,3 +166,19 @@ class TestExtractMessages:
         msgs = list(extract_messages(db_path=imessage_db))
         assert len(msgs) == 1
         assert msgs[0].contact == "unknown"
+
+    def test_keeps_raw_apple_timestamp(self, imessage_db):
+        """date_ns is the raw chat.db value; date converts it lazily."""
+        conn = sqlite3.connect(str(imessage_db))
+        dt = datetime(2024, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
+        apple_ns = datetime_to_apple_ts(dt)
+        conn.execute(
+            "INSERT INTO message (ROWID, text, date, is_from_me, handle_id) VALUES (1, 'Hi', ?, 0, 1)",
+            (apple_ns,),
+        )
+        conn.commit()
+        conn.close()
+
+        msgs = list(extract_messages(db_path=imessage_db))
+        assert msgs[0].date_ns == apple_ns
+        assert msgs[0].date == dt
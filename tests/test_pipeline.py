@@ -0,0 +1,71 @@
+"""Tests for the threaded ingest pipeline."""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.pipeline import ingest_chunks
+from src.vectordb import EMBEDDING_DIM, get_stats
+from tests.conftest import make_chunk
+
+
+def _chunks(n):
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [make_chunk(text=f"Chunk {i}", start_time=base + timedelta(hours=i),
+                       end_time=base + timedelta(hours=i))
+            for i in range(n)]
+
+
+def _fake_batch(texts, db_path=None):
+    rng = np.random.default_rng(len(texts))
+    return rng.standard_normal((len(texts), EMBEDDING_DIM)).tolist()
+
+
+class TestIngestChunks:
+    @patch("src.pipeline.get_embeddings_batch", side_effect=_fake_batch)
+    def test_stores_every_chunk(self, _mock, vector_db):
+        stored = ingest_chunks(iter(_chunks(37)), db_path=vector_db)
+        assert stored == 37
+        assert get_stats(vector_db)["total_chunks"] == 37
+
+    @patch("src.pipeline.get_embeddings_batch", side_effect=_fake_batch)
+    def test_rerun_skips_stored_chunks(self, mock_batch, vector_db):
+        ingest_chunks(iter(_chunks(5)), db_path=vector_db)
+        mock_batch.reset_mock()
+
+        assert ingest_chunks(iter(_chunks(5)), db_path=vector_db) == 0
+        mock_batch.assert_not_called()
+
+    @patch("src.pipeline.get_embedding", side_effect=RuntimeError("bad chunk"))
+    @patch("src.pipeline.get_embeddings_batch", side_effect=RuntimeError("batch failed"))
+    def test_embedding_failures_are_skipped(self, _batch, _single, vector_db, caplog):
+        with caplog.at_level(logging.WARNING, logger="src.pipeline"):
+            assert ingest_chunks(iter(_chunks(3)), db_path=vector_db) == 0
+        messages = [r.getMessage() for r in caplog.records]
+        assert any("Batch embedding failed" in m and "batch failed" in m for m in messages)
+        assert sum("bad chunk" in m for m in messages) == 3
+
+    @patch("src.pipeline.get_embeddings_batch", side_effect=_fake_batch)
+    def test_source_error_is_raised(self, _mock, vector_db):
+        def broken():
+            yield from _chunks(2)
+            raise OSError("chat.db unreadable")
+
+        with pytest.raises(OSError, match="unreadable"):
+            ingest_chunks(broken(), db_path=vector_db)
+
+    @patch("src.pipeline.get_embeddings_batch", side_effect=_fake_batch)
+    def test_on_stored_reports_every_chunk(self, _mock, vector_db):
+        seen = []
+        ingest_chunks(iter(_chunks(23)), db_path=vector_db, on_stored=seen.extend)
+        assert len(seen) == 23
+
+    @patch("src.pipeline.get_embeddings_batch", side_effect=_fake_batch)
+    def test_should_stop_halts_before_reading(self, mock_batch, vector_db):
+        stored = ingest_chunks(iter(_chunks(10)), db_path=vector_db,
+                               should_stop=lambda: True)
+        assert stored == 0
+        mock_batch.assert_not_called()
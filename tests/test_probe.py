@@ -0,0 +1,107 @@
+"""Tests for the cached backend health probe."""
+
+from unittest.mock import MagicMock, patch
+
+import orjson
+import pytest
+import requests
+
+from src.web import probe
+
+URL = "http://localhost:11434/api/tags"
+
+
+def _ok(body):
+    resp = MagicMock()
+    resp.content = orjson.dumps(body)
+    return resp
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    probe.clear()
+    yield
+    probe.clear()
+
+
+class TestCachedGetJson:
+    @patch("src.web.probe._SESSION.get", return_value=_ok({"models": []}))
+    def test_reuses_fresh_response(self, mock_get):
+        assert probe.cached_get_json(URL) == {"models": []}
+        assert probe.cached_get_json(URL) == {"models": []}
+        assert mock_get.call_count == 1
+
+    @patch("src.web.probe._SESSION.get", return_value=_ok({"models": []}))
+    def test_refetches_after_ttl(self, mock_get):
+        probe.cached_get_json(URL, ttl=0)
+        probe.cached_get_json(URL, ttl=0)
+        assert mock_get.call_count == 2
+
+    @patch("src.web.probe._SESSION.get")
+    def test_serves_stale_on_error(self, mock_get):
+        mock_get.return_value = _ok({"models": [{"name": "m"}]})
+        probe.cached_get_json(URL, ttl=0)
+
+        mock_get.side_effect = requests.ConnectionError("down")
+        assert probe.cached_get_json(URL, ttl=0) == {"models": [{"name": "m"}]}
+        with pytest.raises(requests.ConnectionError):
+            probe.cached_get_json(URL, ttl=0, stale_ok=False)
+
+    @patch("src.web.probe.time.monotonic")
+    @patch("src.web.probe._SESSION.get")
+    def test_stale_entry_expires(self, mock_get, mock_clock):
+        mock_clock.return_value = 100.0
+        mock_get.return_value = _ok({"models": [{"name": "m"}]})
+        probe.cached_get_json(URL)
+
+        mock_get.side_effect = requests.ConnectionError("down")
+        mock_clock.return_value = 100.0 + probe._MAX_STALE - 1
+        assert probe.cached_get_json(URL) == {"models": [{"name": "m"}]}
+        mock_clock.return_value = 100.0 + probe._MAX_STALE
+        with pytest.raises(requests.ConnectionError):
+            probe.cached_get_json(URL)
+
+    @patch("src.web.probe._SESSION.get")
+    def test_non_json_body_handled_like_request_error(self, mock_get):
+        mock_get.return_value = _ok({"models": []})
+        probe.cached_get_json(URL, ttl=0)
+
+        mock_get.return_value = MagicMock(content=b"<html>502 Bad Gateway</html>")
+        assert probe.cached_get_json(URL, ttl=0) == {"models": []}
+        with pytest.raises(orjson.JSONDecodeError):
+            probe.cached_get_json(URL, ttl=0, stale_ok=False)
+
+    @patch("src.web.probe._SESSION.get", side_effect=requests.ConnectionError("down"))
+    def test_error_with_nothing_cached_raises(self, _get):
+        with pytest.raises(requests.ConnectionError):
+            probe.cached_get_json(URL)
+
+
+class TestOllamaModels:
+    TAGS = {"models": [{"name": "nomic-embed-text:latest"}, {"name": "llama3.2:3b"}]}
+
+    @patch("src.web.probe._SESSION.get")
+    def test_names_from_cached_tags(self, mock_get):
+        mock_get.return_value = _ok(self.TAGS)
+        models = probe.ollama_models()
+        assert models == ("nomic-embed-text:latest", "llama3.2:3b")
+        assert probe.ollama_models() is models
+        assert mock_get.call_count == 1
+
+    def test_has_model_exact_and_bare_name(self):
+        models = ("nomic-embed-text:latest", "llama3.2:3b")
+        assert probe.has_model(models, "llama3.2:3b")
+        assert probe.has_model(models, "nomic-embed-text")
+        assert not probe.has_model(models, "mistral")
+
+    def test_has_model_no_match_across_entries(self):
+        assert not probe.has_model(("llama3", "2:3b"), "32")
+
+    def test_has_model_bare_name_is_latest_only(self):
+        assert not probe.has_model(("llama3.1:8b",), "llama3")
+        assert not probe.has_model(("llama3:8b",), "llama3")
+        assert not probe.has_model(("my-llama3:latest",), "llama3")
+        assert probe.has_model(("llama3:latest",), "llama3")
+
+    def test_has_model_empty_name(self):
+        assert not probe.has_model(("llama3:latest",), "")
@@ -1,9 +1,26 @@
 """Tests for query formatting and prompt construction."""
 
+import time
 from datetime import datetime, timezone
 from unittest.mock import patch, MagicMock
 
-from src.query import _build_prompt, _format_context, reformulate_query
+import numpy as np
+import requests
+
+from src.query import (
+    _build_prompt,
+    _chat_system_message,
+    _format_context,
+    retrieve,
+    reformulate_query,
+    stream_answer,
+    stream_answer_chat,
+)
+from src.config import EMBED_MODEL
+from src.embed import _cache_key, get_embedding
+from src.semantic_cache import SemanticCache
+from src.vectordb import get_cached_embeddings, insert_chunk
+from tests.conftest import make_chunk
 
 
 class TestFormatContext:
@@ -63,6 +80,15 @@ class TestBuildPrompt:
         assert "NEVER use your own knowledge" in prompt
 
 
+class TestRetrieve:
+    @patch("src.query.search", return_value=[])
+    @patch("src.embed._request_embeddings", return_value=[[0.1] * 768])
+    @patch("src.embed.cache_embeddings")
+    def test_query_embedding_is_not_cached_on_disk(self, mock_cache, _req, _search):
+        retrieve("what time is dinner?")
+        mock_cache.assert_not_called()
+
+
 class TestReformulateQuery:
     def test_no_history_returns_original(self):
         assert reformulate_query("What time?", []) == "What time?"
@@ -91,3 +117,153 @@ class TestReformulateQuery:
         history = [{"role": "user", "content": "prior"}]
         result = reformulate_query("follow up", history)
         assert result == "follow up"
+
+
+def _rephrasings_of(base):
+    """Fake /api/embed: every text embeds to a slightly different nudge of `base`."""
+    def request(texts, retries):
+        return [
+            (base + 1e-3 * np.random.default_rng(len(t)).standard_normal(768)).tolist()
+            for t in texts
+        ]
+    return request
+
+
+class TestStreamAnswerCache:
+    @patch("src.query.stream_chat", return_value=iter(["Dinner ", "at 7."]))
+    @patch("src.query.search")
+    def test_rephrased_query_replays_cached_answer(self, mock_search, mock_chat, vector_db):
+        mock_search.return_value = [{
+            "id": 1, "source": "imessage", "contact": "alice",
+            "start_time": 1705320000.0, "end_time": 1705320000.0,
+            "message_count": 1, "similarity": 0.9, "text": "Dinner at 7?",
+        }]
+        base = np.random.default_rng(0).standard_normal(768)
+
+        def embed_and_cache(text, db_path=None):
+            # Real embedding path, writing embedding_cache rows into the same DB
+            return get_embedding(text, db_path=vector_db)
+
+        with patch("src.query._ANSWER_CACHE", SemanticCache(db_path=vector_db)), \
+             patch("src.embed._request_embeddings", side_effect=_rephrasings_of(base)), \
+             patch("src.query.get_embedding", side_effect=embed_and_cache):
+            first = list(stream_answer("dinner time?"))
+            second = list(stream_answer("what time is dinner?"))
+            third = list(stream_answer("when's dinner"))
+
+        assert len(get_cached_embeddings(
+            [_cache_key(t) for t in ("dinner time?", "what time is dinner?", "when's dinner")],
+            EMBED_MODEL, vector_db,
+        )) == 3
+        assert mock_chat.call_count == 1
+        assert mock_search.call_count == 1
+        for replay in (second, third):
+            assert replay[0] == first[0]  # same sources event
+            assert "".join(e["data"] for e in replay if e["type"] == "token") == "Dinner at 7."
+            assert replay[-1]["type"] == "done"
+
+
+class TestChatSystemMessage:
+    RESULTS = [{
+        "id": 1, "source": "imessage", "contact": "alice",
+        "start_time": 1705320000.0, "end_time": 1705320000.0,
+        "message_count": 1, "similarity": 0.9, "text": "Dinner at 7?",
+    }]
+
+    def test_reused_until_db_changes(self, vector_db):
+        with patch("src.query.VECTOR_DB", vector_db), \
+             patch("src.query._format_context", side_effect=_format_context) as fmt:
+            first = _chat_system_message(self.RESULTS)
+            assert _chat_system_message(self.RESULTS) == first
+            assert fmt.call_count == 1
+
+            _chat_system_message([{**self.RESULTS[0], "similarity": 0.8}])
+            assert fmt.call_count == 2
+
+            insert_chunk(make_chunk(), [0.1] * 768, db_path=vector_db)
+            assert _chat_system_message(self.RESULTS) == first
+            assert fmt.call_count == 3
+
+        assert "Dinner at 7?" in first
+        assert first.endswith("--- END EXCERPTS ---")
+
+    @patch("src.query.stream_chat", side_effect=lambda *a, **k: iter(["ok"]))
+    @patch("src.query.reformulate_query", side_effect=lambda msg, history, timeout: msg)
+    def test_reused_across_turns_that_embed(self, _rewrite, _chat, vector_db):
+        base = np.random.default_rng(0).standard_normal(768)
+
+        def embed_and_cache(text, db_path=None):
+            # Real embedding path, writing embedding_cache rows into the same DB
+            return get_embedding(text, db_path=vector_db)
+
+        with patch("src.query.VECTOR_DB", vector_db), \
+             patch("src.query._ANSWER_CACHE", SemanticCache(db_path=vector_db)), \
+             patch("src.query.search", return_value=self.RESULTS), \
+             patch("src.embed._request_embeddings", side_effect=_rephrasings_of(base)), \
+             patch("src.query.get_embedding", side_effect=embed_and_cache), \
+             patch("src.query._format_context", side_effect=_format_context) as fmt:
+            list(stream_answer_chat("any dinner plans?", []))
+            history = [
+                {"role": "user", "content": "any dinner plans?"},
+                {"role": "assistant", "content": "ok"},
+            ]
+            list(stream_answer_chat("and after that?", history, prior_chunk_ids=[1]))
+
+        assert len(get_cached_embeddings(
+            [_cache_key(t) for t in ("any dinner plans?", "and after that?")],
+            EMBED_MODEL, vector_db,
+        )) == 2
+        assert fmt.call_count == 1
+
+
+def _embed_by_text(text, db_path=None):
+    """Fake embedder that lets tests see which query text was searched."""
+    return [float(len(text))] + [0.0] * 767
+
+
+class TestStreamAnswerChatReformulation:
+    HISTORY = [
+        {"role": "user", "content": "Any dinner plans?"},
+        {"role": "assistant", "content": "Dinner at 7."},
+    ]
+
+    @patch("src.query.stream_chat", return_value=iter(["ok"]))
+    @patch("src.query.search", return_value=[])
+    @patch("src.query.get_embedding", side_effect=_embed_by_text)
+    @patch("src.query.generate_once", return_value="Where is dinner at 7?")
+    def test_uses_rewrite_when_it_arrives(self, _gen, _emb, mock_search, _chat):
+        list(stream_answer_chat("where?", self.HISTORY))
+        searched = [c.args[0][0] for c in mock_search.call_args_list]
+        assert searched == [len("where?"), len("Where is dinner at 7?")]
+
+    @patch("src.query._REFORMULATE_WAIT", 0.05)
+    @patch("src.query.stream_chat", return_value=iter(["ok"]))
+    @patch("src.query.search", return_value=[])
+    @patch("src.query.get_embedding", side_effect=_embed_by_text)
+    @patch("src.query.generate_once")
+    def test_slow_rewrite_falls_back_to_raw_message(self, mock_gen, _emb, mock_search, _chat):
+        mock_gen.side_effect = lambda prompt, timeout: time.sleep(0.5) or "rewritten"
+        list(stream_answer_chat("where?", self.HISTORY))
+        searched = [c.args[0][0] for c in mock_search.call_args_list]
+        assert searched == [len("where?")]
+
+    @patch("src.query._REFORMULATE_WAIT", 0.2)
+    @patch("src.query.stream_chat", side_effect=lambda *a, **k: iter(["ok"]))
+    @patch("src.query.search", return_value=[])
+    @patch("src.query.get_embedding", side_effect=_embed_by_text)
+    @patch("src.query.generate_once")
+    def test_timed_out_rewrites_free_the_pool(self, mock_gen, _emb, mock_search, _chat):
+        def backend(prompt, timeout):
+            if "stalled" in prompt:
+                time.sleep(timeout)  # what the HTTP read timeout does
+                raise requests.Timeout()
+            return "Where is dinner at 7?"
+
+        mock_gen.side_effect = backend
+        for _ in range(6):  # more abandoned rewrites than pool workers
+            list(stream_answer_chat("stalled?", self.HISTORY))
+        mock_search.reset_mock()
+
+        list(stream_answer_chat("where?", self.HISTORY))
+        searched = [c.args[0][0] for c in mock_search.call_args_list]
+        assert searched == [len("where?"), len("Where is dinner at 7?")]
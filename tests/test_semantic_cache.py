@@ -0,0 +1,72 @@
+"""Tests for the semantic answer cache."""
+
+import numpy as np
+
+from src.semantic_cache import SemanticCache
+from src.vectordb import EMBEDDING_DIM, insert_chunk
+from tests.conftest import make_chunk
+
+
+def _vec(seed):
+    return np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).tolist()
+
+
+def _nudged(vec, amount=0.01, seed=99):
+    noise = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM)
+    v = np.array(vec)
+    return (v + amount * np.linalg.norm(v) / np.sqrt(EMBEDDING_DIM) * noise).tolist()
+
+
+KEY = ("answer", 5, None, "ollama", "m")
+
+
+class TestSemanticCache:
+    def test_hit_on_near_identical_query(self, vector_db):
+        cache = SemanticCache(db_path=vector_db)
+        emb = _vec(1)
+        cache.insert(emb, KEY, "q", [{"id": 1}], "cached answer")
+
+        entry = cache.lookup(_nudged(emb), KEY)
+        assert entry is not None
+        assert entry.answer == "cached answer"
+        assert entry.sources == [{"id": 1}]
+
+    def test_miss_on_different_query(self, vector_db):
+        cache = SemanticCache(db_path=vector_db)
+        cache.insert(_vec(1), KEY, "q", [], "a")
+        assert cache.lookup(_vec(2), KEY) is None
+
+    def test_miss_on_different_key(self, vector_db):
+        cache = SemanticCache(db_path=vector_db)
+        emb = _vec(1)
+        cache.insert(emb, KEY, "q", [], "a")
+        assert cache.lookup(emb, ("answer", 10, None, "ollama", "m")) is None
+
+    def test_expired_entries_miss(self, vector_db):
+        cache = SemanticCache(ttl=0, db_path=vector_db)
+        emb = _vec(1)
+        cache.insert(emb, KEY, "q", [], "a")
+        assert cache.lookup(emb, KEY) is None
+
+    def test_evicts_least_recently_used(self, vector_db):
+        cache = SemanticCache(capacity=2, db_path=vector_db)
+        a, b, c = _vec(1), _vec(2), _vec(3)
+        cache.insert(a, KEY, "a", [], "A")
+        cache.insert(b, KEY, "b", [], "B")
+        cache.lookup(a, KEY)  # a is now more recent than b
+        cache.insert(c, KEY, "c", [], "C")
+
+        assert cache.lookup(a, KEY) is not None
+        assert cache.lookup(b, KEY) is None
+        assert cache.lookup(c, KEY) is not None
+
+    def test_cleared_when_db_changes(self, vector_db):
+        cache = SemanticCache(db_path=vector_db)
+        emb = _vec(1)
+        cache.insert(emb, KEY, "q", [], "a")
+        insert_chunk(make_chunk(), emb, db_path=vector_db)
+        assert cache.lookup(emb, KEY) is None
+
+    def test_construction_does_not_open_db(self, vector_db):
+        SemanticCache(db_path=vector_db)
+        assert not vector_db.exists()
@@ -1,6 +1,7 @@
 """Tests for the persistent settings store."""
 
 import json
+import os
 
 import pytest
 
@@ -15,6 +16,7 @@ def isolated_settings(tmp_path, monkeypatch):
     # Reset module-level cache
     settings._cache = None
     settings._cache_mtime = 0.0
+    settings._all_cache = None
     yield settings_path
 
 
@@ -57,3 +59,16 @@ class TestSettings:
         assert all_settings["generation_model"] == "test-model"
         assert "generation_api_url" in all_settings
         assert "generation_api_key" in all_settings
+
+    def test_get_all_reflects_later_save(self, isolated_settings):
+        settings.save({"generation_model": "first"})
+        assert settings.get_all()["generation_model"] == "first"
+        settings.save({"generation_model": "second"})
+        assert settings.get_all()["generation_model"] == "second"
+
+    def test_external_edit_is_picked_up(self, isolated_settings):
+        settings.save({"generation_model": "first"})
+        settings.get_all()
+        isolated_settings.write_text(json.dumps({"generation_model": "edited"}))
+        os.utime(isolated_settings, ns=(0, 10**18))  # force a distinct mtime
+        assert settings.get_all()["generation_model"] == "edited"
@@ -2,16 +2,25 @@
 
 import json
 from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
 
 import numpy as np
 import pytest
 
+from src.embed import get_embedding
 from src.vectordb import (
     EMBEDDING_DIM,
+    _ANN_START,
     _ensure_db,
+    _get_conn,
+    _load_matrix,
+    _sql_cosine,
+    _sync_ann_index,
     fetch_by_ids,
+    filter_new_chunks,
     get_stats,
     insert_chunk,
+    insert_chunks,
     search,
 )
 from tests.conftest import make_chunk
@@ -40,6 +49,18 @@ class TestEnsureDb:
         table_names = [t[0] for t in tables]
         assert "chunks" in table_names
 
+    def test_connection_reused_per_thread(self, vector_db):
+        assert _get_conn(vector_db) is _get_conn(vector_db)
+
+    def test_reopens_after_db_deleted(self, vector_db):
+        insert_chunk(make_chunk(), _random_embedding(seed=1), db_path=vector_db)
+        _get_conn(vector_db)
+        for p in vector_db.parent.glob(vector_db.name + "*"):
+            p.unlink()
+        assert get_stats(vector_db)["total_chunks"] == 0
+        insert_chunk(make_chunk(), _random_embedding(seed=1), db_path=vector_db)
+        assert get_stats(vector_db)["total_chunks"] == 1
+
     def test_idempotent(self, vector_db):
         """Calling _ensure_db twice doesn't error."""
         conn1 = _ensure_db(vector_db)
@@ -147,6 +168,35 @@ class TestInsertAndSearch:
         results = search(query, top_k=5, db_path=vector_db)
         assert results == []
 
+    def test_sees_inserts_after_cached_search(self, vector_db):
+        """The in-memory matrix is rebuilt once the DB changes."""
+        emb = _random_embedding(seed=7)
+        insert_chunk(make_chunk(text="First",
+                                start_time=datetime(2024, 1, 1, tzinfo=timezone.utc)),
+                     emb, db_path=vector_db)
+        assert len(search(emb, top_k=5, db_path=vector_db)) == 1
+
+        insert_chunk(make_chunk(text="Second",
+                                start_time=datetime(2024, 1, 2, tzinfo=timezone.utc)),
+                     emb, db_path=vector_db)
+        assert len(search(emb, top_k=5, db_path=vector_db)) == 2
+
+    def test_embedding_cache_writes_keep_matrix(self, vector_db):
+        """Caching an embedding writes the DB file but must not reload the matrix."""
+        emb = _random_embedding(seed=7)
+        insert_chunk(make_chunk(text="First"), emb, db_path=vector_db)
+        with patch("src.vectordb._load_matrix", wraps=_load_matrix) as load, \
+             patch("src.embed._request_embeddings",
+                   side_effect=lambda texts, retries: [emb for _ in texts]):
+            search(emb, top_k=5, db_path=vector_db)
+            for text in ("dinner?", "lunch?", "brunch?"):
+                search(get_embedding(text, db_path=vector_db), top_k=5, db_path=vector_db)
+            assert load.call_count == 1
+
+            insert_chunk(make_chunk(text="Second", contact="other"), emb, db_path=vector_db)
+            search(emb, top_k=5, db_path=vector_db)
+            assert load.call_count == 2
+
     def test_metadata_roundtrip(self, vector_db):
         """Metadata dict survives insert→search."""
         chunk = make_chunk(metadata={"message_id": "<abc@test.com>"})
@@ -157,6 +207,217 @@ class TestInsertAndSearch:
         assert results[0]["metadata"] == {"message_id": "<abc@test.com>"}
 
 
+class TestInsertChunks:
+    def test_bulk_insert(self, vector_db):
+        items = [
+            (make_chunk(text=f"Bulk {i}",
+                        start_time=datetime(2024, 1, i + 1, tzinfo=timezone.utc)),
+             _random_embedding(seed=i))
+            for i in range(4)
+        ]
+        insert_chunks(items, db_path=vector_db)
+        assert get_stats(vector_db)["total_chunks"] == 4
+
+    def test_bulk_upserts_existing(self, vector_db):
+        now = datetime.now(tz=timezone.utc)
+        emb = _random_embedding(seed=1)
+        insert_chunk(make_chunk(text="Old", start_time=now), emb, db_path=vector_db)
+        insert_chunks([(make_chunk(text="New", start_time=now), emb)], db_path=vector_db)
+
+        results = search(emb, top_k=5, db_path=vector_db)
+        assert len(results) == 1
+        assert results[0]["text"] == "New"
+
+    def test_empty_is_noop(self, vector_db):
+        insert_chunks([], db_path=vector_db)
+        assert not vector_db.exists()
+
+
+class TestFilterNewChunks:
+    def test_skips_unchanged_chunk(self, vector_db):
+        chunk = make_chunk(start_time=datetime(2024, 1, 1, tzinfo=timezone.utc))
+        insert_chunk(chunk, _random_embedding(seed=1), db_path=vector_db)
+        assert filter_new_chunks([chunk], db_path=vector_db) == []
+
+    def test_keeps_grown_window(self, vector_db):
+        """A stored window that gained messages is re-embedded."""
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        old = make_chunk(start_time=start, end_time=start, message_count=1)
+        insert_chunk(old, _random_embedding(seed=1), db_path=vector_db)
+
+        grown = make_chunk(start_time=start, end_time=start + timedelta(hours=1),
+                           message_count=2)
+        assert filter_new_chunks([grown], db_path=vector_db) == [grown]
+
+    def test_email_matched_by_message_id(self, vector_db):
+        stored = make_chunk(source="email", contact="a@example.com",
+                            metadata={"message_id": "<m1@test>"})
+        insert_chunk(stored, _random_embedding(seed=1), db_path=vector_db)
+
+        same = make_chunk(source="email", contact="a@example.com",
+                          start_time=datetime(2020, 1, 1, tzinfo=timezone.utc),
+                          metadata={"message_id": "<m1@test>"})
+        other = make_chunk(source="email", contact="a@example.com",
+                           metadata={"message_id": "<m2@test>"})
+        assert filter_new_chunks([same, other], db_path=vector_db) == [other]
+
+
+class TestEmbeddingStorage:
+    def test_stored_as_half_precision(self, vector_db, monkeypatch):
+        monkeypatch.setattr("src.vectordb._STORAGE_DTYPE", np.float16)
+        insert_chunk(make_chunk(), _random_embedding(seed=3), db_path=vector_db)
+        conn = _ensure_db(vector_db)
+        blob = conn.execute("SELECT embedding FROM chunks").fetchone()[0]
+        conn.close()
+        assert len(blob) == EMBEDDING_DIM * 2
+
+    def test_legacy_float32_rows_still_searchable(self, vector_db):
+        """Rows written as float32 before the switch are decoded by size."""
+        emb = _random_embedding(seed=4)
+        insert_chunk(make_chunk(), emb, db_path=vector_db)
+        conn = _ensure_db(vector_db)
+        conn.execute("UPDATE chunks SET embedding = ?",
+                     (np.array(emb, dtype=np.float32).tobytes(),))
+        conn.commit()
+        conn.close()
+
+        results = search(emb, top_k=1, db_path=vector_db)
+        assert results[0]["similarity"] == pytest.approx(1.0, abs=1e-6)
+
+    def test_stored_unit_norm(self, vector_db):
+        emb = (np.array(_random_embedding(seed=8)) * 5).tolist()
+        insert_chunk(make_chunk(), emb, db_path=vector_db)
+        conn = _ensure_db(vector_db)
+        blob = conn.execute("SELECT embedding FROM chunks").fetchone()[0]
+        conn.close()
+        stored = np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+        assert np.linalg.norm(stored) == pytest.approx(1.0, abs=1e-3)
+
+    def test_legacy_rows_normalized_on_open(self, vector_db):
+        insert_chunk(make_chunk(), _random_embedding(seed=9), db_path=vector_db)
+        conn = _ensure_db(vector_db)
+        raw = np.full(EMBEDDING_DIM, 3.0, dtype=np.float32)
+        conn.execute("UPDATE chunks SET embedding = ?", (raw.tobytes(),))
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+        conn.close()
+
+        conn = _ensure_db(vector_db)
+        blob = conn.execute("SELECT embedding FROM chunks").fetchone()[0]
+        conn.close()
+        stored = np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+        assert np.linalg.norm(stored) == pytest.approx(1.0, abs=1e-3)
+
+
+    def test_int8_columns_dropped_on_open(self, vector_db):
+        insert_chunk(make_chunk(), _random_embedding(seed=10), db_path=vector_db)
+        conn = _ensure_db(vector_db)
+        conn.execute("ALTER TABLE chunks ADD COLUMN embedding_i8 BLOB")
+        conn.execute("ALTER TABLE chunks ADD COLUMN embedding_scale REAL")
+        conn.execute("UPDATE chunks SET embedding_i8 = zeroblob(768), embedding_scale = 1.0")
+        conn.execute("PRAGMA user_version = 1")
+        conn.commit()
+        conn.close()
+
+        conn = _ensure_db(vector_db)
+        cols = {r[1] for r in conn.execute("PRAGMA table_info(chunks)")}
+        conn.close()
+        assert not {"embedding_i8", "embedding_scale"} & cols
+
+
+class TestSqlSearch:
+    def test_matches_in_memory_ranking(self, vector_db, monkeypatch):
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for i in range(6):
+            insert_chunk(make_chunk(source="email" if i % 2 else "imessage",
+                                    text=f"Chunk {i}", start_time=base + timedelta(hours=i)),
+                         _random_embedding(seed=i), db_path=vector_db)
+        query = _random_embedding(seed=3)
+        expected = [r["id"] for r in search(query, top_k=3, db_path=vector_db)]
+        expected_email = [r["id"] for r in search(query, top_k=2, source="email",
+                                                  db_path=vector_db)]
+
+        monkeypatch.setattr("src.vectordb.VECTOR_SEARCH", "sql")
+        results = search(query, top_k=3, db_path=vector_db)
+        assert [r["id"] for r in results] == expected
+        assert results[0]["similarity"] == pytest.approx(1.0, abs=1e-3)
+        email = search(query, top_k=2, source="email", db_path=vector_db)
+        assert [r["id"] for r in email] == expected_email
+
+    def test_cosine_runs_once_per_row(self, vector_db, monkeypatch):
+        for i in range(10):
+            insert_chunk(make_chunk(text=f"Chunk {i}"), _random_embedding(seed=i),
+                         db_path=vector_db)
+        calls = []
+
+        def counting(blob, query_blob):
+            calls.append(1)
+            return _sql_cosine(blob, query_blob)
+
+        _get_conn(vector_db).create_function("cosine", 2, counting, deterministic=True)
+        monkeypatch.setattr("src.vectordb.VECTOR_SEARCH", "sql")
+        assert len(search(_random_embedding(seed=3), top_k=3, db_path=vector_db)) == 3
+        assert len(calls) == 10
+
+
+class TestAnnIndex:
+    def test_search_uses_hnsw_above_threshold(self, vector_db, monkeypatch):
+        pytest.importorskip("hnswlib")
+        monkeypatch.setattr("src.vectordb.ANN_MIN_CHUNKS", 3)
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        embs = [_random_embedding(seed=i) for i in range(5)]
+        for i, emb in enumerate(embs):
+            insert_chunk(make_chunk(text=f"Chunk {i}", start_time=base + timedelta(hours=i)),
+                         emb, db_path=vector_db)
+
+        results = search(embs[2], top_k=2, db_path=vector_db)
+        assert results[0]["text"] == "Chunk 2"
+        assert results[0]["similarity"] == pytest.approx(1.0, abs=1e-3)
+        assert vector_db.with_suffix(".hnsw").exists()
+
+        # Rows added after the index was built are synced on the next search
+        new = _random_embedding(seed=99)
+        insert_chunk(make_chunk(text="Late", start_time=base + timedelta(days=1)),
+                     new, db_path=vector_db)
+        assert search(new, top_k=1, db_path=vector_db)[0]["text"] == "Late"
+
+
+    def _build(self, vector_db, monkeypatch):
+        monkeypatch.setattr("src.vectordb.ANN_MIN_CHUNKS", 3)
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        chunks = [make_chunk(text=f"Chunk {i}", start_time=base + timedelta(hours=i))
+                  for i in range(5)]
+        insert_chunks([(c, _random_embedding(seed=i)) for i, c in enumerate(chunks)],
+                      vector_db)
+        # Written in an earlier second than the first sync
+        conn = _get_conn(vector_db)
+        with conn:
+            conn.execute("UPDATE chunks SET created_at = created_at - 10")
+        index, watermark = _sync_ann_index(vector_db, None, _ANN_START)
+        return chunks, index, watermark
+
+    def test_resync_without_writes_keeps_index_file(self, vector_db, monkeypatch):
+        pytest.importorskip("hnswlib")
+        _, index, watermark = self._build(vector_db, monkeypatch)
+        index_path = vector_db.with_suffix(".hnsw")
+        index_path.unlink()
+
+        _, after = _sync_ann_index(vector_db, index, watermark)
+        assert not index_path.exists()
+        assert after.last_id == watermark.last_id
+
+    def test_resync_picks_up_upserted_embedding(self, vector_db, monkeypatch):
+        pytest.importorskip("hnswlib")
+        chunks, index, watermark = self._build(vector_db, monkeypatch)
+        moved = _random_embedding(seed=123)
+        insert_chunk(chunks[0], moved, db_path=vector_db)  # same id, new vector
+
+        index, _ = _sync_ann_index(vector_db, index, watermark)
+        labels, distances = index.knn_query(np.array(moved, dtype=np.float32), k=1)
+        assert distances[0][0] == pytest.approx(0.0, abs=1e-3)
+        assert fetch_by_ids([int(labels[0][0])], vector_db)[0]["text"] == "Chunk 0"
+
+
 class TestFetchByIds:
     def test_fetch_existing(self, vector_db):
         chunk = make_chunk(text="Fetchable")
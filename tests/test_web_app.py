@@ -0,0 +1,100 @@
+"""Tests for the web app factory: auth/CSRF middleware and lifespan."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.web.app import create_app
+
+CHUNK_URL = "/api/chunk/1"
+
+
+@pytest.fixture
+def health_loop():
+    """Stand-in for run_health_checks that records whether it was cancelled."""
+    state = {"started": False, "cancelled": False}
+
+    async def run():
+        state["started"] = True
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    return run, state
+
+
+@pytest.fixture
+def app_client(tmp_path, health_loop):
+    run, state = health_loop
+    aclose = AsyncMock()
+    with patch("src.web.app.AUTH_TOKEN_PATH", tmp_path / "auth_token"), \
+         patch("src.web.routes.status.run_health_checks", run), \
+         patch("src.web.app.aclose_async_client", aclose), \
+         patch("src.web.routes.query.fetch_by_ids", return_value=[]):
+        app = create_app()
+        with TestClient(app) as client:
+            yield client, app.state.auth_token, state
+    assert state["cancelled"]
+    aclose.assert_awaited_once()
+
+
+class TestAuth:
+    def test_api_requires_token(self, app_client):
+        client, _, _ = app_client
+        resp = client.get(CHUNK_URL)
+        assert resp.status_code == 401
+        assert client.get(CHUNK_URL, headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    def test_bearer_header_accepted(self, app_client):
+        client, token, _ = app_client
+        resp = client.get(CHUNK_URL, headers={"Authorization": f"Bearer {token}"})
+        assert resp.status_code == 404  # reached the route; chunk doesn't exist
+
+    def test_query_param_accepted(self, app_client):
+        client, token, _ = app_client
+        assert client.get(CHUNK_URL, params={"token": token}).status_code == 404
+
+    def test_static_needs_no_token(self, app_client):
+        client, _, _ = app_client
+        resp = client.get("/static/style.css")
+        assert resp.status_code == 200
+
+    def test_token_persisted(self, app_client, tmp_path):
+        _, token, _ = app_client
+        assert (tmp_path / "auth_token").read_text() == token
+
+
+class TestCSRF:
+    def test_foreign_origin_post_rejected(self, app_client):
+        client, token, _ = app_client
+        resp = client.post(
+            "/api/chat/stream",
+            json={"query": "hi"},
+            headers={"Authorization": f"Bearer {token}", "Origin": "http://evil.example"},
+        )
+        assert resp.status_code == 403
+
+    def test_foreign_referer_post_rejected(self, app_client):
+        client, _, _ = app_client
+        resp = client.post(
+            "/ingest/cancel/none", headers={"Referer": "https://evil.example/page"}
+        )
+        assert resp.status_code == 403
+
+    def test_foreign_origin_get_allowed(self, app_client):
+        client, token, _ = app_client
+        resp = client.get(
+            CHUNK_URL, params={"token": token}, headers={"Origin": "http://evil.example"}
+        )
+        assert resp.status_code == 404
+
+
+class TestLifespan:
+    def test_health_loop_runs_during_lifespan(self, app_client):
+        _, _, state = app_client
+        assert state["started"]
+        assert not state["cancelled"]
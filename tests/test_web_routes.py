@@ -0,0 +1,85 @@
+"""Tests for the web UI's polled partial routes (ETag / 304 short-circuit)."""
+
+from functools import partial
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse
+from fastapi.testclient import TestClient
+
+from src.vectordb import cache_embeddings, get_stats, insert_chunk
+from src.web import probe
+from src.web.app import templates
+from src.web.routes import ingest, status
+from src.web.tasks import IngestTask, TaskStatus, task_manager
+from tests.conftest import make_chunk
+
+
+def _render_stub(name, context, headers=None):
+    return HTMLResponse(f"<div>{name}</div>", headers=headers)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(status.router)
+    app.include_router(ingest.router)
+    with patch.object(templates, "TemplateResponse", side_effect=_render_stub):
+        yield TestClient(app)
+
+
+HEALTH = {
+    "ollama": {"status": "online", "models": [], "has_embed": True, "has_gen": None},
+    "generation": {"backend": "ollama", "model": "llama3.2:3b", "status": "via_ollama"},
+}
+
+
+class TestHealthChecks:
+    @patch("src.web.probe._SESSION.get")
+    def test_non_json_tags_reports_offline(self, mock_get):
+        probe.clear()
+        mock_get.return_value = MagicMock(content=b"")
+        current = {"generation_backend": "ollama", "generation_model": "llama3.2:3b"}
+        assert status._check_ollama(current)["status"] == "offline"
+
+
+class TestStatusRefresh:
+    def test_304_until_chunks_change(self, client, vector_db):
+        with patch("src.web.routes.status.VECTOR_DB", vector_db), \
+             patch("src.web.routes.status.get_stats", partial(get_stats, vector_db)), \
+             patch("src.web.routes.status._current_health", AsyncMock(return_value=HEALTH)):
+            insert_chunk(make_chunk(), [0.1] * 768, db_path=vector_db)
+            first = client.get("/status/api/refresh")
+            assert first.status_code == 200
+            etag = first.headers["etag"]
+
+            # Ingest caches embeddings by content hash; that isn't a chunk change
+            cache_embeddings({b"q": [0.1] * 768}, "test-model", vector_db)
+            again = client.get("/status/api/refresh", headers={"If-None-Match": etag})
+            assert again.status_code == 304
+            assert again.headers["etag"] == etag
+
+            insert_chunk(make_chunk(text="Running late"), [0.2] * 768, db_path=vector_db)
+            changed = client.get("/status/api/refresh", headers={"If-None-Match": etag})
+            assert changed.status_code == 200
+            assert changed.headers["etag"] != etag
+
+
+class TestIngestProgress:
+    def test_304_until_progress_moves(self, client):
+        task = IngestTask(id="00000a7f", source="imessage", since=None,
+                          status=TaskStatus.RUNNING)
+        with patch.dict(task_manager._tasks, {task.id: task}):
+            first = client.get(f"/ingest/progress/{task.id}")
+            assert first.status_code == 200
+            etag = first.headers["etag"]
+
+            again = client.get(f"/ingest/progress/{task.id}", headers={"If-None-Match": etag})
+            assert again.status_code == 304
+            assert again.content == b""
+
+            task.chunks_processed += 3
+            moved = client.get(f"/ingest/progress/{task.id}", headers={"If-None-Match": etag})
+            assert moved.status_code == 200
+            assert moved.headers["etag"] != etag